@@ -0,0 +1,154 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+
+from pptxsir import ANIMATION_HEADER, ASSET_HEADER, RowBuffer, find_ppt_files, unzip_pptx
+from fix import iter_slide_trees
+from updated import combine_data_by_slide
+from extracted_pptx import extract_pptx
+from pptx_data import convert_pptx_to_json
+from synthetic_pptx import write_corpus
+
+
+def as_csv_rows(rows, header):
+    # The builders read asset.csv and friends, where every value is a string
+    return [dict(zip(header, ('' if value is None else str(value) for value in row))) for row in rows]
+
+def measure(stage, func, repeat=1, **counts):
+    """Runs func repeat times and returns the stage's timings as a dict.
+
+    The fastest run gives the time; peak memory comes from one more run under
+    tracemalloc, which slows Python down too much to be timed. counts (e.g.
+    decks=, slides=, bytes=) are reported along with their rate per second.
+    """
+    times = []
+    for _ in range(repeat):
+        # Stages print their progress; keep stdout for the JSON report
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(times)
+    result = {'stage': stage, 'seconds': round(seconds, 6), 'runs': repeat, 'peak_memory_bytes': peak}
+    for name, count in counts.items():
+        result[name] = count
+        result[name + '_per_second'] = round(count / seconds, 2) if seconds else None
+    return result
+
+def run_benchmark(ppt_files, repeat=1, workers=1):
+    """Times every stage over the given [path, name] decks and returns the JSON report."""
+    # extract_pptx stops at the first file that isn't a zip, so those are left out up front
+    skipped = [ppt_file[0] for ppt_file in ppt_files if not zipfile.is_zipfile(ppt_file[0])]
+    ppt_files = [ppt_file for ppt_file in ppt_files if ppt_file[0] not in skipped]
+    corpus_bytes = sum(os.path.getsize(ppt_file[0]) for ppt_file in ppt_files)
+    stages = []
+
+    # unzip_pptx / analyze_xml: the extractor behind the four CSVs
+    buffers = {}
+    def extract_rows():
+        buffers.update(anim=RowBuffer(), asset=RowBuffer(), presentation=RowBuffer(), layout=RowBuffer())
+        for ppt_file in ppt_files:
+            unzip_pptx(ppt_file, buffers['anim'], buffers['asset'], buffers['presentation'], buffers['layout'])
+    stages.append(measure('unzip_pptx', extract_rows, repeat, decks=len(ppt_files), bytes=corpus_bytes))
+
+    anim_rows = as_csv_rows(buffers['anim'].rows, ANIMATION_HEADER)
+    asset_rows = as_csv_rows(buffers['asset'].rows, ASSET_HEADER)
+    presentation_rows = as_csv_rows(buffers['presentation'].rows, ASSET_HEADER)
+    layout_rows = as_csv_rows(buffers['layout'].rows, ASSET_HEADER)
+    slides = len({(row['Pptx'], row['Slide']) for row in asset_rows})
+    stages[-1].update(slides=slides, rows=len(anim_rows) + len(asset_rows) + len(presentation_rows) + len(layout_rows))
+
+    def build_trees():
+        for _ in iter_slide_trees(asset_rows):
+            pass
+    stages.append(measure('fix.build_tree', build_trees, repeat, slides=slides, rows=len(asset_rows)))
+
+    def combine():
+        combine_data_by_slide(anim_rows, asset_rows, presentation_rows, layout_rows, 'media_files')
+    stages.append(measure('updated.combine_data_by_slide', combine, repeat, slides=slides,
+                          rows=len(anim_rows) + len(asset_rows) + len(presentation_rows) + len(layout_rows)))
+
+    work_dir = tempfile.mkdtemp(prefix='pptx_benchmark_')
+    try:
+        extracted_folders = [os.path.join(work_dir, f'deck_{i}') for i in range(len(ppt_files))]
+        def extract():
+            for ppt_file, extracted_folder in zip(ppt_files, extracted_folders):
+                extract_pptx(ppt_file[0], extracted_folder)
+        stages.append(measure('extract_pptx', extract, repeat, decks=len(ppt_files), bytes=corpus_bytes))
+
+        def convert():
+            for extracted_folder in extracted_folders:
+                convert_pptx_to_json(extracted_folder, extracted_folder + '.json', workers=workers)
+        stages.append(measure('convert_pptx_to_json', convert, repeat, decks=len(ppt_files), slides=slides))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': {'decks': len(ppt_files), 'slides': slides, 'bytes': corpus_bytes, 'skipped': skipped},
+        'stages': stages
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each stage of the PPTX pipeline and report throughput and peak memory as JSON.")
+    parser.add_argument("--corpus", metavar="DIR",
+                        help="benchmark the .pptx files in DIR instead of a generated synthetic corpus")
+    parser.add_argument("--decks", type=int, default=10, help="synthetic decks to generate (default: 10)")
+    parser.add_argument("--slides", type=int, default=10, help="slides per synthetic deck (default: 10)")
+    parser.add_argument("--depth", type=int, default=2, help="group nesting depth on each synthetic slide (default: 2)")
+    parser.add_argument("--media", type=int, default=2, help="distinct images per synthetic deck (default: 2)")
+    parser.add_argument("--videos", type=int, default=0, help="distinct embedded videos per synthetic deck (default: 0)")
+    parser.add_argument("--animations", type=int, default=4, help="animation effects per synthetic slide (default: 4)")
+    parser.add_argument("--scale", type=int, default=1, help="multiply the number of synthetic decks, e.g. 10 for 10x (default: 1)")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per stage; the fastest is reported (default: 1)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for convert_pptx_to_json (default: 1)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    corpus_dir = None
+    if args.corpus:
+        ppt_files = find_ppt_files(args.corpus)
+    else:
+        corpus_dir = tempfile.mkdtemp(prefix='pptx_corpus_')
+        write_corpus(corpus_dir, args.decks * args.scale, slides=args.slides, depth=args.depth, media=args.media,
+                     animations=args.animations, videos=args.videos)
+        ppt_files = find_ppt_files(corpus_dir)
+
+    try:
+        if not ppt_files:
+            print("No PowerPoint (.pptx) files found in the directory.", file=sys.stderr)
+            sys.exit(1)
+        report = run_benchmark(ppt_files, args.repeat, args.workers)
+        if not args.corpus:
+            report['corpus'].update(synthetic=True, depth=args.depth, media=args.media,
+                                    videos=args.videos, animations=args.animations)
+    finally:
+        if corpus_dir is not None:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import zlib
+import struct
+from array import array
+
+# Parquet is used when pyarrow is installed, otherwise a small stdlib format
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+PARQUET_EXTENSION = '.parquet'
+COLUMNS_EXTENSION = '.cols'
+MAGIC = b'PCOL1\n'
+CHUNK_ROWS = 65536
+# Columns with few distinct values, stored as a dictionary plus a code per row;
+# the others (Asset, Parent, Value, Target ID...) are stored as they are, per chunk
+DICTIONARY_COLUMNS = {'Pptx', 'PPTX', 'Slide', 'Type', 'Name', 'Animation'}
+
+
+def table_path(base_path):
+    """Returns the file a columnar table named base_path is written to, e.g. asset.cols."""
+    return base_path + (PARQUET_EXTENSION if pa is not None else COLUMNS_EXTENSION)
+
+def is_columnar(path):
+    return path.endswith(PARQUET_EXTENSION) or path.endswith(COLUMNS_EXTENSION)
+
+def to_text(value):
+    # Matches what csv.writer writes for each value
+    return '' if value is None else str(value)
+
+
+class ColumnarWriter:
+    """Writes rows to a dictionary-encoded columnar file, with the same interface as csv.writer.
+
+    The DICTIONARY_COLUMNS are stored as a list of distinct strings plus an
+    integer code per row, so the repeating Pptx, Slide, Type and Name values cost
+    a few bytes each. The other columns are mostly distinct and are written out
+    with each chunk. Rows are flushed in chunks, which keeps memory bounded by the
+    chunk size and the distinct values of the dictionary columns.
+    """
+    def __init__(self, path, header):
+        self.path = path
+        self.header = list(header)
+        self.rows = []
+        if path.endswith(PARQUET_EXTENSION):
+            if pa is None:
+                raise ImportError("pyarrow is required to write " + path)
+            schema = pa.schema([(name, pa.dictionary(pa.int32(), pa.string()) if name in DICTIONARY_COLUMNS else pa.string())
+                                for name in self.header])
+            self.parquet_writer = pq.ParquetWriter(path, schema)
+            self.file = None
+        else:
+            self.parquet_writer = None
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+            self.dictionaries = [{} if name in DICTIONARY_COLUMNS else None for name in self.header]
+            self.chunks = []
+
+    def writerow(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= CHUNK_ROWS:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.parquet_writer is not None:
+            columns = [pa.array([to_text(row[i]) for row in self.rows], pa.string()) for i in range(len(self.header))]
+            columns = [column.dictionary_encode() if name in DICTIONARY_COLUMNS else column
+                       for name, column in zip(self.header, columns)]
+            self.parquet_writer.write_table(pa.Table.from_arrays(columns, names=self.header))
+        else:
+            sizes = []
+            for i, dictionary in enumerate(self.dictionaries):
+                if dictionary is None:
+                    data = zlib.compress(json.dumps([to_text(row[i]) for row in self.rows]).encode('utf-8'))
+                    self.file.write(data)
+                    sizes.append(len(data))
+                    continue
+                codes = array('I')
+                for row in self.rows:
+                    value = to_text(row[i])
+                    code = dictionary.get(value)
+                    if code is None:
+                        code = dictionary[value] = len(dictionary)
+                    codes.append(code)
+                if sys.byteorder != 'little':
+                    codes.byteswap()
+                data = zlib.compress(codes.tobytes())
+                self.file.write(data)
+                sizes.append(len(data))
+            self.chunks.append({'rows': len(self.rows), 'sizes': sizes})
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            return
+        # The dictionaries keep growing until the end, so they go in a footer
+        footer = zlib.compress(json.dumps({
+            'columns': self.header,
+            'dictionaries': [list(dictionary) if dictionary is not None else None for dictionary in self.dictionaries],
+            'chunks': self.chunks
+        }).encode('utf-8'))
+        self.file.write(footer)
+        self.file.write(struct.pack('<Q', len(footer)))
+        self.file.write(MAGIC)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_rows(path):
+    """Yields each row of a columnar file as a dict, like csv.DictReader."""
+    if path.endswith(PARQUET_EXTENSION):
+        if pq is None:
+            raise ImportError("pyarrow is required to read " + path)
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a columnar file")
+        file.seek(-(8 + len(MAGIC)), os.SEEK_END)
+        footer_size = struct.unpack('<Q', file.read(8))[0]
+        file.seek(-(8 + len(MAGIC) + footer_size), os.SEEK_END)
+        footer = json.loads(zlib.decompress(file.read(footer_size)))
+
+        columns = footer['columns']
+        dictionaries = footer['dictionaries']
+        file.seek(len(MAGIC))
+        for chunk in footer['chunks']:
+            values = []
+            for dictionary, size in zip(dictionaries, chunk['sizes']):
+                if dictionary is None:
+                    values.append(json.loads(zlib.decompress(file.read(size))))
+                    continue
+                codes = array('I')
+                codes.frombytes(zlib.decompress(file.read(size)))
+                if sys.byteorder != 'little':
+                    codes.byteswap()
+                values.append([dictionary[code] for code in codes])
+            for row in zip(*values):
+                yield dict(zip(columns, row))
+
+def read_rows(path):
+    return list(iter_rows(path))
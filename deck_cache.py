@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+import zipfile
+
+# Bump when the extracted rows change shape, so older caches are not reused
+MANIFEST_VERSION = 2
+
+
+def zip_digest(ppt_zip):
+    """Hashes the member names, CRCs and sizes recorded in an open deck's zip central directory."""
+    digest = hashlib.sha1()
+    for info in ppt_zip.infolist():
+        digest.update(f"{info.filename}\0{info.CRC:08x}\0{info.file_size}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def deck_digest(path):
+    """zip_digest of the deck at path."""
+    with zipfile.ZipFile(path, 'r') as ppt_zip:
+        return zip_digest(ppt_zip)
+
+def write_json_atomic(path, data):
+    """Writes JSON next to its destination and renames it into place."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as json_file:
+        json.dump(data, json_file)
+    os.replace(temp_path, path)
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as json_file:
+        return json.load(json_file)
+
+
+class DeckManifest:
+    """Persistent record of each deck's digest and the rows extracted from it.
+
+    The manifest lives in cache_dir/manifest.json and each deck's rows in
+    cache_dir/rows/<hash of the deck path>.json. signature names the extract
+    filter the rows come from (None for a full extraction); rows stored under
+    another filter are not reused.
+    """
+    def __init__(self, cache_dir, signature=None):
+        self.cache_dir = cache_dir
+        self.signature = signature
+        self.rows_dir = os.path.join(cache_dir, 'rows')
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        os.makedirs(self.rows_dir, exist_ok=True)
+
+        self.decks = {}
+        if os.path.exists(self.manifest_path):
+            manifest = read_json(self.manifest_path)
+            if manifest.get('version') == MANIFEST_VERSION:
+                self.decks = manifest['decks']
+        # Digests computed during this run, reused when the deck's rows are stored
+        self.digests = {}
+
+    def fragment_path(self, key):
+        return os.path.join(self.rows_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def lookup(self, path):
+        """Returns True if the cached rows for the deck at path are still current."""
+        key = os.path.abspath(path)
+        try:
+            digest = deck_digest(path)
+        except (OSError, zipfile.BadZipFile):
+            return False
+        self.digests[key] = digest
+        entry = self.decks.get(key)
+        return (entry is not None and entry['digest'] == digest and entry.get('filter') == self.signature
+                and os.path.exists(self.fragment_path(key)))
+
+    def load(self, path):
+        """Returns the cached animation, asset, presentation and layout rows of a deck."""
+        return read_json(self.fragment_path(os.path.abspath(path)))['rows']
+
+    def store(self, path, rows):
+        """Caches the rows extracted from a deck under its current digest."""
+        key = os.path.abspath(path)
+        digest = self.digests.get(key)
+        if digest is None:
+            try:
+                digest = deck_digest(path)
+            except (OSError, zipfile.BadZipFile):
+                return
+        write_json_atomic(self.fragment_path(key), {'digest': digest, 'rows': rows})
+        self.decks[key] = {'digest': digest}
+        if self.signature is not None:
+            self.decks[key]['filter'] = self.signature
+
+    def save(self):
+        write_json_atomic(self.manifest_path, {'version': MANIFEST_VERSION, 'decks': self.decks})
@@ -0,0 +1,88 @@
+import re
+import json
+
+# Record kinds a filter can keep: animation.csv rows from p:cBhvr, animation.csv
+# rows from p:transition, and the rows of asset.csv, presentation.csv and layout.csv
+RECORD_KINDS = ['animations', 'transitions', 'assets']
+
+
+def parse_slide_range(text):
+    """Parses '3', '3-7', '5-' or '-4' into an inclusive (first, last) pair; an open end is None."""
+    first, dash, last = text.partition('-')
+    try:
+        first = int(first) if first else None
+        last = (int(last) if last else None) if dash else first
+    except ValueError:
+        raise ValueError(f"invalid slide range {text!r}; expected N, N-M, N- or -M")
+    if first is None and last is None:
+        raise ValueError(f"invalid slide range {text!r}; expected N, N-M, N- or -M")
+    return first, last
+
+def slide_number(part_name):
+    """The N of slideN.xml, or None for other part names."""
+    match = re.search(r'(\d+)\.xml$', part_name)
+    return int(match.group(1)) if match else None
+
+
+class ExtractFilter:
+    """Selects the parts and records an extraction run keeps, before the work that would produce the rest.
+
+    part_types are typenames from pptxsir.part_types ('presentation',
+    'slideMaster', 'slideLayout', 'slide'); parts of other types are not read.
+    slides is an inclusive (first, last) range of slide numbers, either end
+    open, that only applies to slide parts. kinds is a subset of RECORD_KINDS:
+    without 'assets' the asset traversal doesn't run, and parts whose XML has no
+    behavior or transition in it aren't parsed at all. asset_types keeps asset
+    rows whose Type is one of them. None keeps everything.
+    """
+    def __init__(self, part_types=None, slides=None, kinds=None, asset_types=None):
+        self.part_types = set(part_types) if part_types is not None else None
+        self.slides = tuple(slides) if slides is not None else None
+        self.kinds = set(kinds) if kinds is not None else None
+        self.asset_types = set(asset_types) if asset_types is not None else None
+        unknown = (self.kinds or set()) - set(RECORD_KINDS)
+        if unknown:
+            raise ValueError(f"unknown record kinds: {', '.join(sorted(unknown))}")
+
+    def wants_type(self, typename):
+        return self.part_types is None or typename in self.part_types
+
+    def wants_part(self, typename, part_name):
+        """Whether a part, e.g. ('slide', 'slide12.xml'), is extracted at all."""
+        if not self.wants_type(typename):
+            return False
+        if typename != 'slide' or self.slides is None:
+            return True
+        number = slide_number(part_name)
+        first, last = self.slides
+        return number is not None and (first is None or number >= first) and (last is None or number <= last)
+
+    def wants(self, kind):
+        return self.kinds is None or kind in self.kinds
+
+    def wants_asset(self, asset_type):
+        return self.asset_types is None or asset_type in self.asset_types
+
+    def skips_data(self, data):
+        """Whether a part's XML bytes can't yield a wanted record, judged without parsing them."""
+        if self.wants('assets'):
+            return False
+        markers = []
+        if self.wants('animations'):
+            markers.append(b'cBhvr')
+        if self.wants('transitions'):
+            markers.append(b'transition')
+        return not any(marker in data for marker in markers)
+
+    def signature(self):
+        """A stable string naming what this filter keeps, for cache and journal keys."""
+        return json.dumps({
+            'part_types': sorted(self.part_types) if self.part_types is not None else None,
+            'slides': list(self.slides) if self.slides is not None else None,
+            'kinds': sorted(self.kinds) if self.kinds is not None else None,
+            'asset_types': sorted(self.asset_types) if self.asset_types is not None else None
+        }, sort_keys=True)
+
+def filter_signature(extract_filter):
+    """extract_filter.signature(), or None for an unfiltered run, whose keys stay as they were."""
+    return extract_filter.signature() if extract_filter is not None else None
@@ -1,10 +1,99 @@
 import os
+import re
 import zipfile
 import shutil
+import argparse
+import posixpath
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+RELS_NAMESPACE = {'rel': 'http://schemas.openxmlformats.org/package/2006/relationships'}
+
+# Package folders that are pulled up to the top of the output folder
+GLOBAL_FOLDERS = {
+    'ppt/theme/': 'theme',
+    'ppt/slideLayouts/': 'layouts',
+    'ppt/slideMasters/': 'masters'
+}
+SLIDE_PATTERN = re.compile(r'ppt/slides/(?:_rels/)?slide(\w+)\.xml(?:\.rels)?$')
+
+def parse_rels(data):
+    """Returns {rel id: target} for the internal relationships in a .rels part."""
+    relations = {}
+    for rel in ET.fromstring(data).findall('rel:Relationship', RELS_NAMESPACE):
+        if rel.get('TargetMode') != 'External':
+            relations[rel.get('Id')] = rel.get('Target')
+    return relations
+
+def resolve_target(part_name, target):
+    """Resolves a relationship target against the part it belongs to, e.g. ppt/media/image1.png."""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part_name), target))
+
+def plan_extraction(zip_ref):
+    """Maps every zip member to the output paths it is written to.
+
+    Slide parts and their rels go to slide_<n>/, media referenced by a slide goes
+    to each referencing slide's folder, themes, layouts and masters go to the
+    top-level theme/, layouts/ and masters/ folders, and everything else keeps its
+    path inside the package.
+    """
+    names = [name for name in zip_ref.namelist() if not name.endswith('/')]
+    plan = {}
+    slide_media = {}
+
+    for name in names:
+        match = SLIDE_PATTERN.match(name)
+        if match:
+            slide_folder = f"slide_{match.group(1)}"
+            plan[name] = [posixpath.join(slide_folder, posixpath.basename(name))]
+            if name.endswith('.rels'):
+                # Media is matched through the parsed relationships, not by name
+                slide_part = name.replace('_rels/', '').replace('.rels', '')
+                for target in parse_rels(zip_ref.read(name)).values():
+                    member = resolve_target(slide_part, target)
+                    if member.startswith('ppt/media/'):
+                        slide_media.setdefault(member, []).append(slide_folder)
+            continue
+
+        for prefix, folder in GLOBAL_FOLDERS.items():
+            if name.startswith(prefix):
+                plan[name] = [folder + '/' + name[len(prefix):]]
+                break
+        else:
+            plan[name] = [name]
+
+    for member, slide_folders in slide_media.items():
+        if member in plan:
+            basename = posixpath.basename(member)
+            plan[member] = [posixpath.join(slide_folder, basename) for slide_folder in dict.fromkeys(slide_folders)]
+
+    return plan
+
+def write_member(zip_ref, member, destinations):
+    """Streams one zip member straight to each of its destination files."""
+    with zip_ref.open(member) as source:
+        if len(destinations) == 1:
+            with open(destinations[0], 'wb') as target:
+                shutil.copyfileobj(source, target)
+            return
+        targets = [open(destination, 'wb') for destination in destinations]
+        try:
+            for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                for target in targets:
+                    target.write(chunk)
+        finally:
+            for target in targets:
+                target.close()
+
+def extract_pptx(pptx_file, output_folder, workers=8, media_store=None):
+    """Extracts a .pptx file into a structured directory with slide-wise folders.
+
+    With a media_store.MediaStore, media goes into the shared store instead of the
+    slide folders, and the store's manifest records where each deck's media went.
+    """
 
-def extract_pptx(pptx_file, output_folder):
-    """Extracts a .pptx file into a structured directory with slide-wise folders."""
-    
     # Ensure the file exists
     if not os.path.exists(pptx_file):
         print(f"🚨 Error: File '{pptx_file}' not found.")
@@ -15,59 +104,60 @@ def extract_pptx(pptx_file, output_folder):
         shutil.rmtree(output_folder)
     os.makedirs(output_folder)
 
-    # Unzip PPTX (PPTX is just a ZIP file)
+    output_root = os.path.realpath(output_folder)
     with zipfile.ZipFile(pptx_file, 'r') as zip_ref:
-        zip_ref.extractall(output_folder)
-
-    # Define paths inside extracted folder
-    ppt_folder = os.path.join(output_folder, "ppt")
-    slides_folder = os.path.join(ppt_folder, "slides")
-    rels_folder = os.path.join(slides_folder, "_rels")
-    media_folder = os.path.join(ppt_folder, "media")
-    theme_folder = os.path.join(ppt_folder, "theme")
-    layout_folder = os.path.join(ppt_folder, "slideLayouts")
-    master_folder = os.path.join(ppt_folder, "slideMasters")
-
-    # Ensure paths exist
-    for folder in [slides_folder, rels_folder, media_folder, theme_folder, layout_folder, master_folder]:
-        os.makedirs(folder, exist_ok=True)
-
-    # Process slides and organize them
-    slide_files = [f for f in os.listdir(slides_folder) if f.startswith("slide") and f.endswith(".xml")]
-
-    for slide_file in slide_files:
-        slide_number = slide_file.replace("slide", "").replace(".xml", "")
-        slide_output = os.path.join(output_folder, f"slide_{slide_number}")
-        os.makedirs(slide_output, exist_ok=True)
-
-        # Move slide XML
-        shutil.move(os.path.join(slides_folder, slide_file), os.path.join(slide_output, slide_file))
-
-        # Move .rels file (if exists)
-        rels_file = f"slide{slide_number}.xml.rels"
-        rels_path = os.path.join(rels_folder, rels_file)
-        if os.path.exists(rels_path):
-            shutil.move(rels_path, os.path.join(slide_output, rels_file))
-
-        # Move related media (images/videos)
-        if os.path.exists(rels_path):
-            with open(rels_path, 'r', encoding='utf-8') as f:
-                rels_content = f.read()
-                for media_file in os.listdir(media_folder):
-                    if media_file in rels_content:
-                        shutil.move(os.path.join(media_folder, media_file), os.path.join(slide_output, media_file))
-
-    # Move global assets
-    shutil.move(theme_folder, os.path.join(output_folder, "theme"))
-    shutil.move(layout_folder, os.path.join(output_folder, "layouts"))
-    shutil.move(master_folder, os.path.join(output_folder, "masters"))
+        jobs = []
+        folders = {os.path.join(output_folder, folder) for folder in GLOBAL_FOLDERS.values()}
+        media_members = []
+        for member, destinations in plan_extraction(zip_ref).items():
+            if media_store is not None and member.startswith('ppt/media/'):
+                media_members.append(member)
+                continue
+            paths = []
+            for destination in destinations:
+                path = os.path.join(output_folder, *destination.split('/'))
+                # Skip members that would land outside the output folder
+                if not os.path.realpath(path).startswith(output_root + os.sep):
+                    continue
+                paths.append(path)
+                folders.add(os.path.dirname(path))
+            if paths:
+                jobs.append((member, paths))
+
+        for folder in folders:
+            os.makedirs(folder, exist_ok=True)
+
+        # Members are decompressed and written in parallel; ZipFile serialises the
+        # raw reads on the shared file handle itself
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            write_futures = [executor.submit(write_member, zip_ref, member, paths) for member, paths in jobs]
+            media_futures = {member: executor.submit(media_store.add_member, zip_ref, member) for member in media_members}
+            for future in write_futures:
+                future.result()
+            media_keys = {member: future.result() for member, future in media_futures.items()}
+
+        if media_store is not None:
+            media_store.record_deck(os.path.basename(pptx_file), zip_ref, media_keys, pptx_file)
+            media_store.save()
 
     print(f"✅ PPTX extracted and organized in '{output_folder}'")
 
 
-# ✅ Correct File Path
-pptx_file = "03 Relative Motion.pptx"  # Replace with actual file path
-output_folder = "extracted_pptx"
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract a .pptx file into slide-wise folders.")
+    parser.add_argument("pptx_file", nargs="?", default="03 Relative Motion.pptx")
+    parser.add_argument("output_folder", nargs="?", default="extracted_pptx")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="threads decompressing and writing members (default: 8)")
+    parser.add_argument("--media-store", metavar="DIR",
+                        help="put media into the content-addressed store at DIR, created if missing, instead of the slide folders")
+    args = parser.parse_args()
+
+    # media_store imports this module, so it is only loaded when asked for
+    media_store = None
+    if args.media_store:
+        from media_store import MediaStore
+        media_store = MediaStore(args.media_store)
 
-# Run the function
-extract_pptx(pptx_file, output_folder)
+    # Run the function
+    extract_pptx(args.pptx_file, args.output_folder, args.workers, media_store)
@@ -1,12 +1,15 @@
 import csv
 import json
+import argparse
 from collections import defaultdict
+from itertools import groupby
+import columnar
 
 def build_tree(rows):
     # Create a dictionary of nodes where each node will include a "children" array
     nodes = {}
     for row in rows:
-        asset_id = row.get("Asset", "").strip()
+        asset_id = (row.get("Asset") or "").strip()
         node = {key: value for key, value in row.items() if key not in ["Pptx", "Slide"]}  # Remove "Pptx" and "Slide" keys from children
         node["children"] = []
         nodes[asset_id] = node
@@ -14,7 +17,7 @@ def build_tree(rows):
     # Build the hierarchy by connecting child nodes to their parent node
     tree = {}
     for asset_id, node in nodes.items():
-        parent = node.get("Parent", "").strip()
+        parent = (node.get("Parent") or "").strip()
         if parent.lower() == "root" or parent == "":
             # If node has "Root" (or empty) as parent, add it as a top-level node
             tree[asset_id] = node
@@ -28,18 +31,38 @@ def build_tree(rows):
                 tree[asset_id] = node
     return tree
 
-def main():
-    input_csv = "asset.csv"
-    output_json = "asset.json"
+def read_rows(path):
+    """Yields the rows of asset.csv, or of a columnar copy written by pptxsir.py --columnar."""
+    if columnar.is_columnar(path):
+        yield from columnar.iter_rows(path)
+        return
+    with open(path, newline='', encoding='utf-8') as fp:
+        yield from csv.DictReader(fp)
+
+def iter_slide_trees(rows):
+    """Builds one tree per run of consecutive rows from the same deck and slide.
+
+    pptxsir.py writes each slide's rows together, so only one slide is held at a time.
+    """
+    for (pptx, slide), group in groupby(rows, key=lambda row: (row.get("Pptx") or "", (row.get("Slide") or "").strip())):
+        yield pptx, slide, build_tree(group)
+
+def write_ndjson(rows, output_path):
+    """Writes one JSON line per slide as its tree is built."""
+    with open(output_path, "w", encoding="utf-8") as fp:
+        for pptx, slide, tree in iter_slide_trees(rows):
+            json.dump({"pptx": pptx, "slide": slide, "tree": tree}, fp)
+            fp.write("\n")
+
+def build_slide_trees(rows):
+    """Builds {slide: tree of assets} from asset rows."""
     result = {}
     # Group rows by Slide for separate trees per slide.
     slides = defaultdict(list)
 
-    with open(input_csv, newline='', encoding='utf-8') as fp:
-        reader = csv.DictReader(fp)
-        for row in reader:
-            slide = row.get("Slide", "").strip()
-            slides[slide].append({key: value for key, value in row.items() if key != "Pptx"})  # Remove "Pptx" key
+    for row in rows:
+        slide = (row.get("Slide") or "").strip()
+        slides[slide].append({key: value for key, value in row.items() if key != "Pptx"})  # Remove "Pptx" key
     
     # Build a nested structure: Slide -> tree of assets
     for slide, rows in slides.items():
@@ -47,6 +70,26 @@ def main():
         for node in tree.values():
             node.pop("Slide", None)  # Remove "Slide" key from top-level nodes
         result[slide] = tree
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-slide asset trees from asset.csv.")
+    parser.add_argument("input", nargs="?", default="asset.csv",
+                        help="asset table, as CSV or a columnar copy (default: asset.csv)")
+    parser.add_argument("--stream", action="store_true",
+                        help="write one NDJSON line per deck and slide while reading, instead of one JSON document")
+    parser.add_argument("--output", help="output path (default: asset.json, or asset.ndjson with --stream)")
+    args = parser.parse_args()
+
+    input_csv = args.input
+    if args.stream:
+        output_json = args.output or "asset.ndjson"
+        write_ndjson(read_rows(input_csv), output_json)
+        print(f"NDJSON file created: {output_json}")
+        return
+
+    output_json = args.output or "asset.json"
+    result = build_slide_trees(read_rows(input_csv))
 
     # Write the JSON result to the output file with indentation for readability.
     with open(output_json, "w", encoding="utf-8") as fp:
@@ -0,0 +1,155 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import posixpath
+
+from extracted_pptx import parse_rels, resolve_target
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class MediaStore:
+    """Content-addressed media store shared by every extracted deck.
+
+    Each distinct file is stored once as objects/<2 hex>/<sha256><ext>, however
+    many decks or slides use it. manifest.json maps each deck's media members and
+    each (part, rel id) that points at them to the object's hash, and lists the
+    file names that more than one deck path has used.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.lock = threading.Lock()
+
+        self.objects = {}
+        self.decks = {}
+        self.ambiguous = set()
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+            self.objects = manifest['objects']
+            self.decks = manifest['decks']
+            self.ambiguous = set(manifest.get('ambiguous', []))
+
+    @classmethod
+    def open_existing(cls, root):
+        """Returns the store at root, or None if nothing has been stored there yet."""
+        if not os.path.exists(os.path.join(root, 'manifest.json')):
+            return None
+        return cls(root)
+
+    def add(self, source, name):
+        """Streams a file object into the store and returns its hash; name only supplies the extension."""
+        digest = hashlib.sha256()
+        handle, temp_path = tempfile.mkstemp(dir=self.objects_dir)
+        try:
+            with os.fdopen(handle, 'wb') as target:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    target.write(chunk)
+            key = digest.hexdigest()
+            object_path = posixpath.join(key[:2], key + posixpath.splitext(name)[1].lower())
+            destination = os.path.join(self.objects_dir, *object_path.split('/'))
+            with self.lock:
+                # Identical bytes may already be stored under another extension; keep that path
+                if key in self.objects or os.path.exists(destination):
+                    os.remove(temp_path)
+                    self.objects.setdefault(key, object_path)
+                else:
+                    os.makedirs(os.path.dirname(destination), exist_ok=True)
+                    os.replace(temp_path, destination)
+                    self.objects[key] = object_path
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return key
+
+    def add_member(self, zip_ref, member):
+        with zip_ref.open(member) as source:
+            return self.add(source, member)
+
+    def record_deck(self, deck, zip_ref, media_keys, path=None):
+        """Records a deck's media members and every relationship that points at one of them.
+
+        Decks are keyed by file name, the Pptx column of asset.csv. A name already
+        recorded for a different path can't tell their rows apart, so it is marked
+        ambiguous, resolves no media from then on, and False is returned.
+        """
+        path = os.path.abspath(path) if path is not None else None
+        rels = {}
+        for name in zip_ref.namelist():
+            if not name.endswith('.rels'):
+                continue
+            part = name.replace('_rels/', '')[:-len('.rels')]
+            for rel_id, target in parse_rels(zip_ref.read(name)).items():
+                key = media_keys.get(resolve_target(part, target))
+                if key is not None:
+                    rels.setdefault(part, {})[rel_id] = key
+        with self.lock:
+            existing = self.decks.get(deck, {}).get('path')
+            if path is not None and existing is not None and existing != path:
+                print(f"⚠️ Media of '{path}' not recorded, and rows of '{deck}' no longer resolve to the store: "
+                      f"the name already belongs to '{existing}'")
+                self.ambiguous.add(deck)
+                return False
+            self.decks[deck] = {'path': path, 'media': media_keys, 'rels': rels}
+        return True
+
+    def path(self, key):
+        return os.path.join(self.objects_dir, *self.objects[key].split('/'))
+
+    def resolve(self, deck, part, target):
+        """Returns the stored path of the media a part's relationship target points at, or None."""
+        entry = self.decks.get(deck)
+        if entry is None or not target or deck in self.ambiguous:
+            return None
+        key = entry['media'].get(resolve_target(part, target))
+        return self.path(key) if key is not None else None
+
+    def save(self):
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump({'objects': self.objects, 'decks': self.decks, 'ambiguous': sorted(self.ambiguous)}, manifest_file)
+        os.replace(temp_path, self.manifest_path)
+
+def media_store_argument(parser):
+    """Adds the JSON builders' --media-store option to an argparse parser."""
+    parser.add_argument("--media-store", metavar="DIR",
+                        help="point media at the content-addressed store extracted_pptx.py --media-store filled at DIR")
+
+def open_media_store(parser, args):
+    """The store named by --media-store, or None without one; a directory holding no store is an error."""
+    if not args.media_store:
+        return None
+    media_store = MediaStore.open_existing(args.media_store)
+    if media_store is None:
+        parser.error(f"no media store at '{args.media_store}'")
+    return media_store
+
+# Asset types whose value is a relationship target pointing at media
+MEDIA_TYPES = {'Media', 'Image', 'Video'}
+
+def resolve_media(media_store, row):
+    """Returns the stored path of the media an asset.csv row points at, or None."""
+    if media_store is None or row['Type'] not in MEDIA_TYPES:
+        return None
+    return media_store.resolve(row['Pptx'], 'ppt/slides/' + row['Slide'], row['Value'])
+
+def asset_value(media_store, row, local_path):
+    """The value a JSON builder writes for an asset.csv row.
+
+    Media is pointed at its location in the content-addressed store when there is
+    one; other Media rows get local_path(value), their folder path in place of the
+    rid. The row itself is left as it is, since it may be a shared pptxsir record.
+    """
+    stored_path = resolve_media(media_store, row)
+    if stored_path is not None:
+        return stored_path
+    if row['Type'] == 'Media':
+        return local_path(row['Value'])
+    return row['Value']
@@ -1,55 +1,38 @@
-import csv
 import json
-import os
-from collections import defaultdict
+import argparse
+from itertools import groupby
+from fix import read_rows
+from media_store import media_store_argument, open_media_store
+from parent_child_format import read_csv_to_dict, write_json
+from parent_child_format import organize_data_by_slide as organize_assets
 
-def read_csv_to_dict(file_path):
-    with open(file_path, mode='r', newline='') as csv_file:
-        return list(csv.DictReader(csv_file))
+def should_keep_node(node):
+    # A node is kept if it has a value or, once its own children are pruned, any child left
+    return node['asset_value'] != 'None' or bool(node['children'])
 
-def replace_rid_with_path(value, base_path):
-    # Normalize the path to avoid duplicates
-    return os.path.normpath(f"{base_path}/{value}")
+def prune_children(assets):
+    # Collect every node below the top level once, parents before children
+    order = []
+    stack = list(assets.values())
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node['children'].values())
 
-def should_keep_node(node):
-    # Check if the node or any of its children have a non-None asset_value
-    if node['asset_value'] != 'None':
-        return True
-    for child in node['children'].values():
-        if should_keep_node(child):
-            return True
-    return False
+    # Walking that list backwards prunes each node's children before the node itself
+    # is judged, so keep/drop is decided once per node and no subtree is walked twice
+    for node in reversed(order):
+        if node['children']:
+            node['children'] = {child_id: child for child_id, child in node['children'].items() if should_keep_node(child)}
 
 def filter_assets(assets):
-    # Filter assets to remove those with asset_value: None and no valuable children
+    # Filter assets to remove those with asset_value: None and no valuable children, at every depth
+    prune_children(assets)
     return {asset_id: asset for asset_id, asset in assets.items() if should_keep_node(asset)}
 
-def organize_data_by_slide(asset_data, base_path):
-    slides_data = defaultdict(lambda: {
-        'assets': {}
-    })
-
-    for row in asset_data:
-        slide = row['Slide']
-        # Replace 'rid' with folder path for media files
-        if row['Type'] == 'Media':
-            row['Value'] = replace_rid_with_path(row['Value'], base_path)
-        
-        asset_info = {
-            'asset_id': row['Asset'],
-            'asset_name': row['Name'],
-            'asset_type': row['Type'],
-            'asset_value': row['Value'],
-            'children': {}  # Initialize children dictionary for hierarchical structure
-        }
-
-        # If the asset has a parent, nest it under the parent
-        parent_id = row['Parent']
-        if parent_id and parent_id in slides_data[slide]['assets']:
-            slides_data[slide]['assets'][parent_id]['children'][row['Asset']] = asset_info
-        else:
-            # Otherwise, add it as a top-level asset
-            slides_data[slide]['assets'][row['Asset']] = asset_info
+def organize_data_by_slide(asset_data, base_path, media_store=None):
+    # Nest the assets as parent_child_format.py does, then prune each slide
+    slides_data = organize_assets(asset_data, base_path, media_store)
 
     # Filter assets to remove unnecessary nodes
     for slide in slides_data:
@@ -57,18 +40,37 @@ def organize_data_by_slide(asset_data, base_path):
 
     return slides_data
 
-def write_json(data, output_file):
-    with open(output_file, 'w') as json_file:
-        json.dump(data, json_file, indent=4)
+def iter_slides(asset_data, base_path, media_store=None):
+    # Build and prune one slide at a time from consecutive rows of the same deck and slide
+    for (pptx, slide), rows in groupby(asset_data, key=lambda row: (row.get('Pptx'), row['Slide'])):
+        yield pptx, slide, organize_data_by_slide(rows, base_path, media_store)[slide]
+
+def write_ndjson(asset_data, base_path, output_file, media_store=None):
+    # One JSON line per deck and slide, written as each slide is pruned
+    with open(output_file, 'w', encoding='utf-8') as json_file:
+        for pptx, slide, slide_data in iter_slides(asset_data, base_path, media_store):
+            json.dump({'pptx': pptx, 'slide': slide, 'assets': slide_data['assets']}, json_file)
+            json_file.write('\n')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nest the assets of asset.csv by parent and prune those without values, per slide.")
+    parser.add_argument("--stream", action="store_true",
+                        help="write one NDJSON line per deck and slide while reading, instead of one JSON document")
+    media_store_argument(parser)
+    args = parser.parse_args()
+    media_store = open_media_store(parser, args)
 
-# Read data from CSV files
-asset_data = read_csv_to_dict('asset.csv')
+    # Define the base path for media files
+    base_path = 'media_files'
 
-# Define the base path for media files
-base_path = 'media_files'
+    if args.stream:
+        write_ndjson(read_rows('asset.csv'), base_path, 'parent-child-fix_new.ndjson', media_store)
+    else:
+        # Read data from CSV files
+        asset_data = read_csv_to_dict('asset.csv')
 
-# Organize data by slide
-slides_data = organize_data_by_slide(asset_data, base_path)
+        # Organize data by slide
+        slides_data = organize_data_by_slide(asset_data, base_path, media_store)
 
-# Write organized data to JSON
-write_json(slides_data, 'parent-child-fix_new.json')
\ No newline at end of file
+        # Write organized data to JSON
+        write_json(slides_data, 'parent-child-fix_new.json')
@@ -1,9 +1,16 @@
 import csv
 import json
+import argparse
 import os
+from functools import partial
 from collections import defaultdict
+from columnar import is_columnar, read_rows
+from media_store import asset_value, media_store_argument, open_media_store
 
 def read_csv_to_dict(file_path):
+    # Columnar copies written by pptxsir.py --columnar are read the same way
+    if is_columnar(file_path):
+        return read_rows(file_path)
     with open(file_path, mode='r', newline='') as csv_file:
         return list(csv.DictReader(csv_file))
 
@@ -11,32 +18,73 @@ def replace_rid_with_path(value, base_path):
     # Normalize the path to avoid duplicates
     return os.path.normpath(f"{base_path}/{value}")
 
-def organize_data_by_slide(asset_data, base_path):
+def find_top(links, index):
+    # Follow the links up to the top-level asset, halving the path on the way so
+    # later lookups take a step or two
+    while links[index] != index:
+        links[index] = links[links[index]]
+        index = links[index]
+    return index
+
+def organize_data_by_slide(asset_data, base_path, media_store=None):
     slides_data = defaultdict(lambda: {
         'assets': {}
     })
+    # Per slide: every asset read so far at any depth, by id, with its index in links
+    nodes_by_slide = defaultdict(dict)
+    # Per slide: for each asset read, the index of the asset it is nested under, or
+    # its own at the top level. Links are only added, so the top an asset ends up
+    # below is found without walking its parents one by one
+    links_by_slide = defaultdict(list)
+    # Per slide: assets read before their parent, by the parent id they are waiting for
+    waiting_by_slide = defaultdict(dict)
 
+    local_path = partial(replace_rid_with_path, base_path=base_path)
     for row in asset_data:
         slide = row['Slide']
-        # Replace 'rid' with folder path for media files
-        if row['Type'] == 'Media':
-            row['Value'] = replace_rid_with_path(row['Value'], base_path)
+        # Replace 'rid' with folder path for media files, or with the media's stored location
+        value = asset_value(media_store, row, local_path)
         
+        asset_id = row['Asset']
         asset_info = {
-            'asset_id': row['Asset'],
+            'asset_id': asset_id,
             'asset_name': row['Name'],
             'asset_type': row['Type'],
-            'asset_value': row['Value'],
+            'asset_value': value,
             'children': {}  # Initialize children dictionary for hierarchical structure
         }
 
-        # If the asset has a parent, nest it under the parent
+        assets = slides_data[slide]['assets']
+        nodes = nodes_by_slide[slide]
+        links = links_by_slide[slide]
+        waiting = waiting_by_slide[slide]
+        index = len(links)
+
+        # If the asset's parent has been read, nest it under the parent at whatever depth it is
         parent_id = row['Parent']
-        if parent_id and parent_id in slides_data[slide]['assets']:
-            slides_data[slide]['assets'][parent_id]['children'][row['Asset']] = asset_info
+        parent = nodes.get(parent_id) if parent_id and parent_id != asset_id else None
+        if parent is not None:
+            parent_index, parent_info = parent
+            parent_info['children'][asset_id] = asset_info
+            links.append(parent_index)
         else:
-            # Otherwise, add it as a top-level asset
-            slides_data[slide]['assets'][row['Asset']] = asset_info
+            # Otherwise, add it as a top-level asset until its parent turns up
+            assets[asset_id] = asset_info
+            links.append(index)
+            if parent_id:
+                waiting.setdefault(parent_id, []).append((index, asset_info))
+        nodes[asset_id] = (index, asset_info)
+
+        # Nest the assets that were read before this one, their parent, except the
+        # one this asset already sits below, which would make the two a cycle
+        top = find_top(links, index) if asset_id in waiting else None
+        for child_index, child in waiting.pop(asset_id, ()):
+            child_id = child['asset_id']
+            if assets.get(child_id) is not child or child_index == top:
+                continue
+            del assets[child_id]
+            asset_info['children'][child_id] = child
+            links[child_index] = index
 
     return slides_data
 
@@ -44,14 +92,20 @@ def write_json(data, output_file):
     with open(output_file, 'w') as json_file:
         json.dump(data, json_file, indent=4)
 
-# Read data from CSV files
-asset_data = read_csv_to_dict('asset.csv')
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nest the assets of asset.csv by parent, per slide.")
+    media_store_argument(parser)
+    args = parser.parse_args()
+    media_store = open_media_store(parser, args)
+
+    # Read data from CSV files
+    asset_data = read_csv_to_dict('asset.csv')
 
-# Define the base path for media files
-base_path = 'media_files'
+    # Define the base path for media files
+    base_path = 'media_files'
 
-# Organize data by slide
-slides_data = organize_data_by_slide(asset_data, base_path)
+    # Organize data by slide
+    slides_data = organize_data_by_slide(asset_data, base_path, media_store)
 
-# Write organized data to JSON
-write_json(slides_data, 'parent_child_format.json')
\ No newline at end of file
+    # Write organized data to JSON
+    write_json(slides_data, 'parent_child_format.json')
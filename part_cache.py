@@ -0,0 +1,76 @@
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+from deck_cache import read_json
+
+# Bump when the rows extracted from a part change shape, so older entries are not reused
+PART_CACHE_VERSION = 1
+
+
+def part_key(part_name, data, relations, signature=None):
+    """Hashes a part's name, its XML bytes, the relationships it resolves against and,
+    for a filtered run, the extract filter's signature."""
+    digest = hashlib.sha1(f"{PART_CACHE_VERSION}\0{part_name}\0".encode('utf-8'))
+    digest.update(data)
+    digest.update(json.dumps(sorted((relations or {}).items())).encode('utf-8'))
+    if signature is not None:
+        digest.update(b'\0' + signature.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class PartCache:
+    """LRU cache of the rows extracted from shared parts such as slide layouts and masters.
+
+    Decks built from the same template carry byte-identical layouts and masters,
+    so their rows only differ in the deck name. Entries hold the rows without it.
+    With a directory, entries are also written to directory/<key>.json and read
+    back on a memory miss, so later runs and other worker processes share them;
+    eviction only applies to the in-memory entries.
+    """
+    def __init__(self, max_entries=256, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """Returns the rows stored under key, or None."""
+        rows = self.entries.get(key)
+        if rows is not None:
+            self.entries.move_to_end(key)
+        elif self.directory is not None and os.path.exists(self.entry_path(key)):
+            try:
+                rows = read_json(self.entry_path(key))
+            except (OSError, ValueError):
+                rows = None
+            if rows is not None:
+                self.remember(key, rows)
+        if rows is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return rows
+
+    def put(self, key, rows):
+        self.remember(key, rows)
+        if self.directory is not None:
+            # Several workers may write the same entry; each renames its own temp file into place
+            handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(handle, 'w', encoding='utf-8') as json_file:
+                json.dump(rows, json_file)
+            os.replace(temp_path, self.entry_path(key))
+
+    def remember(self, key, rows):
+        self.entries[key] = rows
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
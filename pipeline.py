@@ -0,0 +1,70 @@
+"""In-memory pipeline from the pptxsir extractor to the JSON builders, with no CSV files in between.
+
+    tables = extract_tables(pptxsir.find_ppt_files('decks/'))
+    trees = build_asset_trees(tables['asset'])              # fix.py's asset.json
+    slides = organize_assets_by_slide(tables['asset'])      # parent_child_format.json
+    combined = combine_tables_by_slide(tables)              # updated.json
+    write_csv_tables(tables, 'out/')                        # the CSVs, if still wanted
+"""
+import os
+import csv
+import zipfile
+import traceback
+
+from pptxsir import ANIMATION_HEADER, ASSET_HEADER, iter_deck_records
+from fix import build_slide_trees
+from updated import combine_data_by_slide
+from parent_child_format import organize_data_by_slide
+
+# The tables pptxsir writes, each to <table>.csv
+TABLES = ['animation', 'asset', 'presentation', 'layout']
+
+
+def iter_records(ppt_files):
+    """Yields (table, record) pairs for each deck in turn.
+
+    ppt_files holds [path, name] pairs as returned by find_ppt_files, or plain
+    paths. As with pptxsir.unzip_pptx, a deck that fails part way is reported and
+    keeps the records yielded before the error.
+    """
+    for ppt_file in ppt_files:
+        if isinstance(ppt_file, str):
+            ppt_file = [ppt_file, os.path.basename(ppt_file)]
+        try:
+            with zipfile.ZipFile(ppt_file[0], 'r') as ppt_zip:
+                yield from iter_deck_records(ppt_file, ppt_zip)
+        except Exception as e:
+            print(f"Error processing {ppt_file[0]}: {e}")
+            traceback.print_exc()
+
+def extract_tables(ppt_files):
+    """Returns {table: [records]} for the given decks."""
+    tables = {table: [] for table in TABLES}
+    for table, record in iter_records(ppt_files):
+        tables[table].append(record)
+    return tables
+
+# The builders read records by CSV column name, as they read csv.DictReader
+# rows, so no dict is built per row. Values are not stringified, so a missing
+# attribute stays None (null in the JSON) where the CSV round trip would have
+# produced an empty string.
+def build_asset_trees(asset_records):
+    """fix.py's {slide: tree of assets}."""
+    return build_slide_trees(asset_records)
+
+def organize_assets_by_slide(asset_records, base_path='media_files', media_store=None):
+    """parent_child_format.py's {slide: {'assets': nested assets}}."""
+    return organize_data_by_slide(asset_records, base_path, media_store)
+
+def combine_tables_by_slide(tables, base_path='media_files', media_store=None):
+    """updated.py's {slide: {'animations', 'assets', 'presentation', 'layout'}}."""
+    return combine_data_by_slide(tables['animation'], tables['asset'], tables['presentation'], tables['layout'],
+                                 base_path, media_store)
+
+def write_csv_tables(tables, directory='.'):
+    """Writes the tables to the same four CSV files pptxsir.py produces."""
+    for table in TABLES:
+        with open(os.path.join(directory, table + '.csv'), mode='w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(ANIMATION_HEADER if table == 'animation' else ASSET_HEADER)
+            writer.writerows(tables[table])
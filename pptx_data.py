@@ -1,6 +1,9 @@
 import os
 import json
+import argparse
 import xml.etree.ElementTree as ET
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 # Namespace for parsing XML
 NAMESPACE = {
@@ -27,6 +30,36 @@ def parse_xml_to_dict(xml_file):
 
     return parse_element(root)
 
+def stream_xml_to_json(xml_file, json_file):
+    """Writes the parse_xml_to_dict structure of an XML file straight to an open JSON file.
+
+    Elements are written as iterparse reaches them and dropped once they end, so
+    memory stays bounded by the depth of the document rather than its size.
+    """
+    elements = []
+    has_children = []
+    for event, element in ET.iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            if has_children:
+                if has_children[-1]:
+                    json_file.write(", ")
+                has_children[-1] = True
+            json_file.write('{"tag": %s, "attributes": %s, "children": [' % (
+                json.dumps(element.tag.split("}")[-1]), json.dumps(dict(element.attrib))))
+            elements.append(element)
+            has_children.append(False)
+        else:
+            json_file.write("]")
+            # The text is only complete once the element has ended
+            if element.text and element.text.strip():
+                json_file.write(', "text": ' + json.dumps(element.text.strip()))
+            json_file.write("}")
+            elements.pop()
+            has_children.pop()
+            element.clear()
+            if elements:
+                elements[-1].remove(element)
+
 def parse_rels(rels_file):
     """Parses a .rels file and extracts linked media, layouts, and masters."""
     relationships = {"media": [], "layout": None, "master": None}
@@ -48,48 +81,77 @@ def parse_rels(rels_file):
 
     return relationships
 
-def convert_pptx_to_json(extracted_folder, output_json):
+def find_slide_files(slide_path):
+    """Returns the slide XML, rels and notes file names in a slide folder."""
+    slide_content_file = None
+    rels_file = None
+    notes_file = None
+
+    for file in os.listdir(slide_path):
+        if file.startswith("slide") and file.endswith(".xml"):
+            slide_content_file = file
+        elif file.startswith("slide") and file.endswith(".xml.rels"):
+            rels_file = file
+        elif file.startswith("notesSlide") and file.endswith(".xml"):
+            notes_file = file
+
+    return slide_content_file, rels_file, notes_file
+
+def list_global_assets(extracted_folder):
+    global_assets = {"themes": [], "layouts": [], "masters": []}
+    for asset_type in ["theme", "layouts", "masters"]:
+        asset_path = os.path.join(extracted_folder, asset_type)
+        if os.path.exists(asset_path):
+            global_assets[asset_type] = os.listdir(asset_path)
+    return global_assets
+
+def parse_slide_folder(extracted_folder, slide_folder):
+    """Parses the XML, rels and notes of one slide folder."""
+    slide_number = int(slide_folder.replace("slide_", ""))
+    slide_path = os.path.join(extracted_folder, slide_folder)
+
+    slide_content_file, rels_file, notes_file = find_slide_files(slide_path)
+
+    slide_content = parse_xml_to_dict(os.path.join(slide_path, slide_content_file)) if slide_content_file else None
+    rels_data = parse_rels(os.path.join(slide_path, rels_file)) if rels_file else None
+    notes_content = parse_xml_to_dict(os.path.join(slide_path, notes_file)) if notes_file else None
+
+    return {
+        "slide_number": slide_number,
+        "content": slide_content,
+        "relationships": rels_data,
+        "notes": notes_content
+    }
+
+def parse_slide_folders(extracted_folder, slide_folders, workers=1):
+    """Parses slide folders, across a process pool when workers is more than one."""
+    parse = partial(parse_slide_folder, extracted_folder)
+    if workers != 1 and len(slide_folders) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers or None) as executor:
+                return list(executor.map(parse, slide_folders))
+        except (OSError, NotImplementedError) as e:
+            # Platforms without working process pools parse the slides serially
+            print(f"Parsing slides serially: {e}")
+    return [parse(slide_folder) for slide_folder in slide_folders]
+
+def convert_pptx_to_json(extracted_folder, output_json, stream=False, workers=1):
     """Converts extracted PPTX files into structured JSON with parsed XML content."""
+    if stream:
+        stream_pptx_to_json(extracted_folder, output_json)
+        return
     
-    json_data = {"slides": [], "global_assets": {"themes": [], "layouts": [], "masters": []}}
+    json_data = {"slides": [], "global_assets": {}}
 
     slide_folders = [f for f in os.listdir(extracted_folder) if f.startswith("slide_")]
 
-    for slide_folder in slide_folders:
-        slide_number = int(slide_folder.replace("slide_", ""))
-        slide_path = os.path.join(extracted_folder, slide_folder)
-
-        slide_content_file = None
-        rels_file = None
-        notes_file = None
-
-        for file in os.listdir(slide_path):
-            if file.startswith("slide") and file.endswith(".xml"):
-                slide_content_file = file
-            elif file.startswith("slide") and file.endswith(".xml.rels"):
-                rels_file = file
-            elif file.startswith("notesSlide") and file.endswith(".xml"):
-                notes_file = file
-
-        slide_content = parse_xml_to_dict(os.path.join(slide_path, slide_content_file)) if slide_content_file else None
-        rels_data = parse_rels(os.path.join(slide_path, rels_file)) if rels_file else None
-        notes_content = parse_xml_to_dict(os.path.join(slide_path, notes_file)) if notes_file else None
-
-        json_data["slides"].append({
-            "slide_number": slide_number,
-            "content": slide_content,
-            "relationships": rels_data,
-            "notes": notes_content
-        })
+    json_data["slides"] = parse_slide_folders(extracted_folder, slide_folders, workers)
 
     # Sort slides by slide_number
     json_data["slides"] = sorted(json_data["slides"], key=lambda x: x["slide_number"])
 
     # Process global assets
-    for asset_type in ["theme", "layouts", "masters"]:
-        asset_path = os.path.join(extracted_folder, asset_type)
-        if os.path.exists(asset_path):
-            json_data["global_assets"][asset_type] = os.listdir(asset_path)
+    json_data["global_assets"] = list_global_assets(extracted_folder)
 
     # Write JSON file
     with open(output_json, "w", encoding="utf-8") as json_file:
@@ -97,8 +159,51 @@ def convert_pptx_to_json(extracted_folder, output_json):
 
     print(f"✅ JSON file created and sorted: {output_json}")
 
-# Run the script
-extracted_folder = "extracted_pptx"
-output_json = "pptx_data.json"
+def stream_pptx_to_json(extracted_folder, output_json):
+    """Writes the same document as convert_pptx_to_json one slide at a time, without indentation.
+
+    Each slide's XML is streamed into the file as it is parsed, so no slide is
+    ever held in memory as a whole.
+    """
+    slide_folders = sorted((f for f in os.listdir(extracted_folder) if f.startswith("slide_")),
+                           key=lambda f: int(f.replace("slide_", "")))
+
+    with open(output_json, "w", encoding="utf-8") as json_file:
+        json_file.write('{"slides": [')
+        for index, slide_folder in enumerate(slide_folders):
+            slide_path = os.path.join(extracted_folder, slide_folder)
+            slide_content_file, rels_file, notes_file = find_slide_files(slide_path)
+
+            if index:
+                json_file.write(", ")
+            json_file.write('{"slide_number": %d, "content": ' % int(slide_folder.replace("slide_", "")))
+            if slide_content_file:
+                stream_xml_to_json(os.path.join(slide_path, slide_content_file), json_file)
+            else:
+                json_file.write("null")
+            json_file.write(', "relationships": ')
+            json.dump(parse_rels(os.path.join(slide_path, rels_file)) if rels_file else None, json_file)
+            json_file.write(', "notes": ')
+            if notes_file:
+                stream_xml_to_json(os.path.join(slide_path, notes_file), json_file)
+            else:
+                json_file.write("null")
+            json_file.write("}")
+        json_file.write('], "global_assets": ')
+        json.dump(list_global_assets(extracted_folder), json_file)
+        json_file.write("}")
+
+    print(f"✅ JSON file created and sorted: {output_json}")
 
-convert_pptx_to_json(extracted_folder, output_json)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert an extracted PPTX folder into JSON.")
+    parser.add_argument("extracted_folder", nargs="?", default="extracted_pptx")
+    parser.add_argument("output_json", nargs="?", default="pptx_data.json")
+    parser.add_argument("--stream", action="store_true",
+                        help="write each slide as it is parsed instead of building the whole document in memory")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes parsing slides in parallel; 0 uses every core (default: 1, serial)")
+    args = parser.parse_args()
+
+    # Run the script
+    convert_pptx_to_json(args.extracted_folder, args.output_json, args.stream, args.workers)
@@ -1,11 +1,28 @@
 import os
-import sys
+import io
 import zipfile
 import xml.etree.ElementTree as ET
 import csv
 import traceback
 import re
-import random
+import argparse
+import fnmatch
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from deck_cache import DeckManifest, zip_digest
+from columnar import ColumnarWriter, table_path
+from sqlite_store import SqliteStore
+from run_stats import DeckStats, StatsLog, timed
+from part_cache import PartCache, part_key
+from run_journal import RunJournal
+from records import ANIMATION_HEADER, ASSET_HEADER, AnimationRecord, animation_record, asset_record, record_types
+from extract_filter import RECORD_KINDS, ExtractFilter, filter_signature, parse_slide_range
+
+# lxml, when it is installed, parses with its C parser and gives elements a parent pointer
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
 
 # Define namespaces
 namespaces = {
@@ -16,78 +33,296 @@ namespaces = {
     'rel': 'http://schemas.openxmlformats.org/package/2006/relationships'
 }
 
-def get_auto_id():
-    return "Auto_"+str(random.randint(1001, 4999))
+def qname(prefixed):
+    """Expands a prefixed name such as 'p:sp' into ElementTree's '{uri}sp' form."""
+    prefix, local = prefixed.split(':')
+    return '{' + namespaces[prefix] + '}' + local
+
+P_TXBODY = qname('p:txBody')
+P_SPPR = qname('p:spPr')
+P_CNVPR = qname('p:cNvPr')
+P_EXTLST = qname('p:extLst')
+P_SLDLAYOUTID = qname('p:sldLayoutId')
+P_CLRMAP = qname('p:clrMap')
+P_SLDID = qname('p:sldId')
+A_R = qname('a:r')
+A_T = qname('a:t')
+A_PRSTGEOM = qname('a:prstGeom')
+A_CUSTGEOM = qname('a:custGeom')
+A_BLIP = qname('a:blip')
+A_VIDEOFILE = qname('a:videoFile')
+A_GRAPHICDATA = qname('a:graphicData')
+P14_MEDIA = qname('p14:media')
+R_EMBED = qname('r:embed')
+R_LINK = qname('r:link')
+R_ID = qname('r:id')
+
+# Child elements that are reported as assets of their own and traversed further,
+# in the order their rows are emitted
+parentElements = {
+    qname('p:cSld'): "Slide", 
+    qname('p:bg'): "Background", 
+    qname('p:pic'): "Picture", 
+    qname('p:blipFill'): "Picture", 
+    qname('p:nvPicPr'): "Picture",
+    qname('p:nvPr'): "Picture",
+    qname('p:spTree'): "Tree", 
+    qname('p:grpSp'): "Group", 
+    qname('p:sp'): "Shape", 
+    qname('p:graphicFrame'): "Graphic", 
+    qname('p:cxnSp'): "Connector",
+    qname('p:sldLayoutIdLst'): "LayoutList",
+    qname('p:sldIdLst'): "SlideList"
+}
+
+# Part types in the order they are extracted, with the table their assets are written to
+part_types = [
+    ('ppt/', 'presentation', 'presentation'),
+    ('ppt/slideMasters/', 'slideMaster', 'presentation'),
+    ('ppt/slideLayouts/', 'slideLayout', 'layout'),
+    ('ppt/slides/', 'slide', 'asset')
+]
+# Template parts that repeat byte for byte across decks, extracted through the PartCache
+cached_part_types = {'slideMaster', 'slideLayout'}
+
+# Paths the extractors look up by name, compiled once per backend
+xml_paths = {
+    'target': './p:tgtEl/p:spTgt',
+    'attr_name': './p:attrNameLst/p:attrName',
+    'to_value': './p:to/p:strVal',
+    'behaviors': './/p:cBhvr',
+    'transitions': './/p:transition',
+    'relationships': './rel:Relationship',
+    'media': './*/*/p:extLst/*/p14:media',
+    'id_element': './*/p:cNvPr'
+}
+
+
+class EtreeBackend:
+    """Parses parts with xml.etree.ElementTree. Elements have no parent pointer, so TreeScan maps them."""
+    name = 'etree'
+    has_parents = False
+    precompiled = False
+    parse_errors = (ET.ParseError,)
+    Element = staticmethod(ET.Element)
+    SubElement = staticmethod(ET.SubElement)
+
+    def fromstring(self, data):
+        return ET.fromstring(data)
+
+    def parse(self, file):
+        return ET.parse(file).getroot()
+
+    def iterparse(self, source, events):
+        return ET.iterparse(source, events=events)
+
+    def find(self, name, element):
+        return element.find(xml_paths[name], namespaces)
+
+    def findall(self, name, element):
+        return element.findall(xml_paths[name], namespaces)
+
+
+class LxmlBackend:
+    """Parses parts with lxml, looking paths up with precompiled XPath and parents with getparent().
+
+    Comments and processing instructions are dropped while parsing, as
+    ElementTree does, so child positions and with them the Auto_ ids come out
+    the same. huge_tree lifts lxml's limits on depth and text size, which
+    ElementTree doesn't have either.
+    """
+    name = 'lxml'
+    has_parents = True
+    precompiled = True
+
+    def __init__(self):
+        self.parser = lxml_etree.XMLParser(remove_comments=True, remove_pis=True, huge_tree=True)
+        self.parse_errors = (lxml_etree.XMLSyntaxError,)
+        self.Element = lxml_etree.Element
+        self.SubElement = lxml_etree.SubElement
+        self.paths = {name: lxml_etree.XPath(path, namespaces=namespaces) for name, path in xml_paths.items()}
+        self.count_descendants = lxml_etree.XPath('count(.//*)')
+
+    def fromstring(self, data):
+        return lxml_etree.fromstring(data, self.parser)
+
+    def parse(self, file):
+        return lxml_etree.parse(file, self.parser).getroot()
+
+    def iterparse(self, source, events):
+        return lxml_etree.iterparse(source, events=events, remove_comments=True, remove_pis=True, huge_tree=True)
+
+    def find(self, name, element):
+        found = self.paths[name](element)
+        return found[0] if found else None
+
+    def findall(self, name, element):
+        return self.paths[name](element)
+
+
+class ParentPointers:
+    """Stands in for TreeScan's parent map when elements know their parent."""
+    def __getitem__(self, element):
+        return element.getparent()
+
+
+xml_backends = {'etree': EtreeBackend}
+if lxml_etree is not None:
+    xml_backends['lxml'] = LxmlBackend
+
+# The backend this process parses with: lxml when it is installed
+xml_backend = xml_backends['lxml' if lxml_etree is not None else 'etree']()
+
+def use_xml_backend(name):
+    """Switches this process to the 'lxml' or 'etree' backend; both extract identical rows."""
+    global xml_backend
+    if name not in xml_backends:
+        raise ValueError(f"XML backend {name!r} is not available; choose from {', '.join(sorted(xml_backends))}")
+    if name != xml_backend.name:
+        xml_backend = xml_backends[name]()
+
+etree_backend = EtreeBackend()
+
+def backend_for(element):
+    """The backend whose lookups fit an element: xml_backend, or etree for stdlib elements.
+
+    Callers such as analyze_xml may pass roots they parsed with ElementTree
+    while lxml is the default; lxml's XPath and getparent() don't take those.
+    """
+    if xml_backend.has_parents and not isinstance(element, lxml_etree._Element):
+        return etree_backend
+    return xml_backend
+
+def get_auto_id(path, suffix=None):
+    """Builds an asset id from an element's child-index path below the part root.
+
+    The path is unique within a part and stays the same from run to run, so the
+    ids do too.
+    """
+    return "Auto_" + path if suffix is None else "Auto_" + path + "-" + suffix
+
+def child_path(path, *positions):
+    """Appends child positions to a dotted child-index path."""
+    suffix = '.'.join(str(position) for position in positions)
+    return path + '.' + suffix if path else suffix
 
 def get_asset_tag(asset):
     return re.sub(r'\{[^}]*\}', '', asset.tag),
 
-def get_asset(element, assets, parentId, relation):
-    for txBody in element.findall('./p:txBody', namespaces):
-        texts = txBody.findall('./*/a:r/a:t', namespaces)
-        if texts is not None and len(texts) > 0:
-            asset_info = {
-                'id': get_auto_id(),
-                'parentId': parentId,
-                'name': "Text",
-                'type': "Text",
-                'value': texts[0].text if texts is not None and len(texts) > 0 else "None"
-            }
+def get_children_by_tag(element):
+    """Groups the (position, child) pairs of an element by tag, visiting each child once."""
+    children = {}
+    for position, child in enumerate(element):
+        children.setdefault(child.tag, []).append((position, child))
+    return children
+
+def find_first_text(txBody):
+    """Returns the first ./*/a:r/a:t element below a text body, or None."""
+    for paragraph in txBody:
+        for run in paragraph:
+            if run.tag == A_R:
+                for text in run:
+                    if text.tag == A_T:
+                        return text
+    return None
+
+def find_child(element, tag):
+    for child in element:
+        if child.tag == tag:
+            return child
+    return None
+
+def find_media(element, path=''):
+    """Returns (path, element) pairs for the ./*/*/p:extLst/*/p14:media elements below an element."""
+    media = []
+    # Compiled XPath rules out the usual case, no media at all, without walking the children
+    backend = backend_for(element)
+    if backend.precompiled and not backend.findall('media', element):
+        return media
+    for i, child in enumerate(element):
+        for j, grandchild in enumerate(child):
+            for k, ext_lst in enumerate(grandchild):
+                if ext_lst.tag == P_EXTLST:
+                    for l, ext in enumerate(ext_lst):
+                        for m, item in enumerate(ext):
+                            if item.tag == P14_MEDIA:
+                                media.append((child_path(path, i, j, k, l, m), item))
+    return media
+
+# One asset found in a part, before it becomes an AssetRecord
+Asset = namedtuple('Asset', ['id', 'parentId', 'name', 'type', 'value'])
+
+def get_asset(element, assets, parentId, relation, children=None, path='', media_items=None):
+    if children is None:
+        children = get_children_by_tag(element)
+    if media_items is None:
+        media_items = find_media(element, path)
+
+    for position, txBody in children.get(P_TXBODY, ()):
+        text = find_first_text(txBody)
+        if text is not None:
+            asset_info = Asset(
+                id=get_auto_id(child_path(path, position)),
+                parentId=parentId,
+                name="Text",
+                type="Text",
+                value=text.text
+            )
             assets.append(asset_info)
     
-    for spPr in element.findall('./p:spPr', namespaces):
-        geom = spPr.find('./a:prstGeom', namespaces)
+    for position, spPr in children.get(P_SPPR, ()):
+        geom = find_child(spPr, A_PRSTGEOM)
         if geom is None:
-            geom = spPr.find('./a:custGeom', namespaces)
+            geom = find_child(spPr, A_CUSTGEOM)
             if geom is None:
-                asset_info = {
-                    'id': get_auto_id(),
-                    'parentId': parentId,
-                    'name': "Custom Geometry",
-                    'type': "Shape",
-                    'value': "None"
-                }
+                asset_info = Asset(
+                    id=get_auto_id(child_path(path, position)),
+                    parentId=parentId,
+                    name="Custom Geometry",
+                    type="Shape",
+                    value="None"
+                )
                 assets.append(asset_info)
             else:
-                asset_info = {
-                    'id': get_auto_id(),
-                    'parentId': parentId,
-                    'name': "Unknown Geometry",
-                    'type': "Shape",
-                    'value': "None"
-                }
+                asset_info = Asset(
+                    id=get_auto_id(child_path(path, position)),
+                    parentId=parentId,
+                    name="Unknown Geometry",
+                    type="Shape",
+                    value="None"
+                )
                 assets.append(asset_info)
         else:
-            asset_info = {
-                'id': get_auto_id(),
-                'parentId': parentId,
-                'name': "Preset Geometry",
-                'type': "Shape",
-                'value': geom.get("prst")
-            }
+            asset_info = Asset(
+                id=get_auto_id(child_path(path, position)),
+                parentId=parentId,
+                name="Preset Geometry",
+                type="Shape",
+                value=geom.get("prst")
+            )
             assets.append(asset_info)
 
 
-    for blip in element.findall('./a:blip', namespaces):
-        embed = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-        asset_info = {
-            'id': get_auto_id(),
-            'parentId': parentId,
-            'name': "Blip",
-            'type': "Image",
-            'value': relation.get(embed, "Rel not found")
-        }
+    for position, blip in children.get(A_BLIP, ()):
+        embed = blip.get(R_EMBED)
+        asset_info = Asset(
+            id=get_auto_id(child_path(path, position)),
+            parentId=parentId,
+            name="Blip",
+            type="Image",
+            value=relation.get(embed, "Rel not found")
+        )
         assets.append(asset_info)
     
-    for video in element.findall('./a:videoFile', namespaces):
-        embed = video.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}link')
-        asset_info = {
-            'id': get_auto_id(),
-            'parentId': parentId,
-            'name': "Video",
-            'type': "Video",
-            'value': relation.get(embed, "Rel not found")
-        }
+    for position, video in children.get(A_VIDEOFILE, ()):
+        embed = video.get(R_LINK)
+        asset_info = Asset(
+            id=get_auto_id(child_path(path, position)),
+            parentId=parentId,
+            name="Video",
+            type="Video",
+            value=relation.get(embed, "Rel not found")
+        )
         assets.append(asset_info)
     
     # for video in element.findall('./*/a:videoFile', namespaces):
@@ -101,142 +336,176 @@ def get_asset(element, assets, parentId, relation):
     #     }
     #     assets.append(asset_info)
     
-    for media in element.findall('./*/*/p:extLst/*/p14:media', namespaces):
-        embed = media.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-        asset_info = {
-            'id': get_auto_id(),
-            'parentId': parentId,
-            'name': "Media",
-            'type': "Media",
-            'value': relation.get(embed, "Rel not found")
-        }
+    media = None
+    for media_path, media in media_items:
+        embed = media.get(R_EMBED)
+        asset_info = Asset(
+            id=get_auto_id(media_path),
+            parentId=parentId,
+            name="Media",
+            type="Media",
+            value=relation.get(embed, "Rel not found")
+        )
         assets.append(asset_info)
 
-    for graphic_data in element.findall('./a:graphicData', namespaces):
-        for child in graphic_data:
-            embed = media.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-            asset_info = {
-                'id': get_auto_id(),
-                'parentId': parentId,
-                'name': get_asset_tag(child),
-                'type': "Graphic Data",
-                'value': relation.get(embed, "Rel not found")
-            }
+    for position, graphic_data in children.get(A_GRAPHICDATA, ()):
+        for index, child in enumerate(graphic_data):
+            embed = media.get(R_EMBED) if media is not None else None
+            asset_info = Asset(
+                id=get_auto_id(child_path(path, position, index)),
+                parentId=parentId,
+                name=get_asset_tag(child),
+                type="Graphic Data",
+                value=relation.get(embed, "Rel not found")
+            )
             assets.append(asset_info)
 
-    for layout_data in element.findall('./p:sldLayoutId', namespaces):
+    for position, layout_data in children.get(P_SLDLAYOUTID, ()):
         id = layout_data.get('id')
-        layoutId = layout_data.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-        asset_info = {
-            'id': id,
-            'parentId': parentId,
-            'name': "Layout data",
-            'type': "Layout data",
-            'value': relation.get(layoutId, "Rel not found")
-        }
+        layoutId = layout_data.get(R_ID)
+        asset_info = Asset(
+            id=id,
+            parentId=parentId,
+            name="Layout data",
+            type="Layout data",
+            value=relation.get(layoutId, "Rel not found")
+        )
         assets.append(asset_info)
 
-    for clrMap in element.findall('./p:clrMap', namespaces):
+    for position, clrMap in children.get(P_CLRMAP, ()):
         for key, value in clrMap.attrib.items():
-            asset_info = {
-                'id': get_auto_id(),
-                'parentId': parentId,
-                'name': key,
-                'type': "ColorMap",
-                'value': value
-            }
+            asset_info = Asset(
+                id=get_auto_id(child_path(path, position), key),
+                parentId=parentId,
+                name=key,
+                type="ColorMap",
+                value=value
+            )
             assets.append(asset_info)
 
-    for slide in element.findall('./p:sldId', namespaces):
+    for position, slide in children.get(P_SLDID, ()):
         id = slide.get('id')
-        layoutId = slide.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-        asset_info = {
-            'id': id,
-            'parentId': parentId,
-            'name': "Slide",
-            'type': "Slide",
-            'value': relation.get(layoutId, "Rel not found")
-        }
+        layoutId = slide.get(R_ID)
+        asset_info = Asset(
+            id=id,
+            parentId=parentId,
+            name="Slide",
+            type="Slide",
+            value=relation.get(layoutId, "Rel not found")
+        )
         assets.append(asset_info)
 
 
 # Function to extract all assets and shapes
-def get_assets_and_shapes(element, assets, parentId, relation):
-    get_asset(element, assets, parentId, relation)
-
-    parentElements = {
-        './p:cSld': "Slide", 
-        './p:bg': "Background", 
-        './p:pic': "Picture", 
-        './p:blipFill': "Picture", 
-        './p:nvPicPr': "Picture",
-        './p:nvPr': "Picture",
-        './p:spTree': "Tree", 
-        './p:grpSp': "Group", 
-        './p:sp': "Shape", 
-        './p:graphicFrame': "Graphic", 
-        './p:cxnSp': "Connector",
-        './p:sldLayoutIdLst': "LayoutList",
-        './p:sldIdLst': "SlideList"
-    }
+def get_assets_and_shapes(element, assets, parentId, relation, path=''):
+    # Children are grouped by tag once and shared by get_asset and the traversal
+    # below, instead of rescanning them for every xpath
+    children = get_children_by_tag(element)
+    get_asset(element, assets, parentId, relation, children, path)
+    backend = backend_for(element)
 
-    for xpath in parentElements:
-        for asset in element.findall(xpath, namespaces):
-            idElement = asset.find('./*/p:cNvPr', namespaces)
-            id = idElement.get('id') if idElement is not None else "Auto_"+str(random.randint(1001, 4999))
+    for tag in parentElements:
+        for position, asset in children.get(tag, ()):
+            asset_path = child_path(path, position)
+            if backend.precompiled:
+                idElement = backend.find('id_element', asset)
+            else:
+                idElement = None
+                for child in asset:
+                    idElement = find_child(child, P_CNVPR)
+                    if idElement is not None:
+                        break
+            id = idElement.get('id') if idElement is not None else get_auto_id(asset_path)
             name = idElement.get('name') if idElement is not None else "None"
-            asset_info = {
-                'id': id,
-                'parentId': parentId,
-                'name': name,
-                'type': parentElements[xpath],
-                'value': "None"
-            }
+            asset_info = Asset(
+                id=id,
+                parentId=parentId,
+                name=name,
+                type=parentElements[tag],
+                value="None"
+            )
             assets.append(asset_info)
-            get_assets_and_shapes(asset, assets, id, relation)
+            get_assets_and_shapes(asset, assets, id, relation, asset_path)
+
+
+P_CBHVR = qname('p:cBhvr')
+P_TRANSITION = qname('p:transition')
+
+# Elements counted by total_anim_count
+anim_tags = [qname('p:' + name) for name in
+             ('set', 'cmd', 'animEffect', 'anim', 'animClr', 'animMotion', 'animRot', 'animScale', 'transition')]
+# Every tag total_anim_count and total_bhvr_count read
+counted_tags = anim_tags + [P_CBHVR]
+
+
+class TreeScan:
+    """Single walk over a part: tag histogram, parent map, behaviors and transitions.
+
+    With a backend whose elements know their parent (lxml), parent_map looks
+    parents up instead of mapping every element, and only the tags the count
+    check needs are counted.
+    """
+    def __init__(self, root):
+        self.tag_counts = Counter()
+        self.behaviors = []
+        self.transitions = []
+        backend = backend_for(root)
+        if backend.has_parents:
+            # Only the tags the count check reads are visited, filtered in C; lxml
+            # also looks parents up itself
+            self.parent_map = ParentPointers()
+            self.element_count = int(backend.count_descendants(root))
+            for element in root.iterdescendants(*counted_tags):
+                tag = element.tag
+                self.tag_counts[tag] += 1
+                if tag == P_CBHVR:
+                    self.behaviors.append(element)
+                elif tag == P_TRANSITION:
+                    self.transitions.append(element)
+            return
+
+        elements = root.iter()
+        next(elements)  # The counts only cover elements below the root, like './/'
+        self.parent_map = {}
+        for child in root:
+            self.parent_map[child] = root
+        for element in elements:
+            tag = element.tag
+            self.tag_counts[tag] += 1
+            if tag == P_CBHVR:
+                self.behaviors.append(element)
+            elif tag == P_TRANSITION:
+                self.transitions.append(element)
+            for child in element:
+                self.parent_map[child] = element
+        self.element_count = sum(self.tag_counts.values())
 
 
 # Function to extract animations and behaviors
-def total_anim_count(element):
-    count = 0
-    for anim in element.findall('.//p:set', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:cmd', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:animEffect', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:anim', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:animClr', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:animMotion', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:animRot', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:animScale', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:transition', namespaces):
-        count = count + 1
-    return count
+def total_anim_count(element, tag_counts=None):
+    if tag_counts is None:
+        tag_counts = TreeScan(element).tag_counts
+    return sum(tag_counts[tag] for tag in anim_tags)
 
 # Function to extract animations and behaviors
-def total_bhvr_count(element):
-    count = 0
-    for anim in element.findall('.//p:cBhvr', namespaces):
-        count = count + 1
-    for anim in element.findall('.//p:transition', namespaces):
-        count = count + 1
-    return count
+def total_bhvr_count(element, tag_counts=None):
+    if tag_counts is None:
+        tag_counts = TreeScan(element).tag_counts
+    return tag_counts[P_CBHVR] + tag_counts[P_TRANSITION]
 
 
 # Function to extract animations and behaviors
-def extract_animations_and_behaviors(element, parent_map, animations):
+def extract_animations_and_behaviors(element, parent_map, animations, behaviors=None):
     # for anim in element.findall('.//p:cTn', namespaces):
     #     anim_id = anim.get('id')
         
+    if behaviors is None:
+        behaviors = backend_for(element).findall('behaviors', element)
+
     # Check for behaviors within animations
-    for behavior in element.findall('.//p:cBhvr', namespaces):
-        target_element = behavior.find('./p:tgtEl/p:spTgt', namespaces)
+    for behavior in behaviors:
+        backend = backend_for(behavior)
+        target_element = backend.find('target', behavior)
         if target_element is not None:
             spid = target_element.get('spid')
             
@@ -246,10 +515,10 @@ def extract_animations_and_behaviors(element, parent_map, animations):
                 parent_type = parent_node.tag if parent_node is not None else None
                 parent_type = parent_type.split('}')[-1] if parent_type else None  # Extract local name
                 if parent_type == 'set':
-                    attr_name_elem = behavior.find('./p:attrNameLst/p:attrName', namespaces)
+                    attr_name_elem = backend.find('attr_name', behavior)
                     if attr_name_elem is not None:
                         property_name = attr_name_elem.text  # Get the property name
-                        value_elem = parent_node.find('./p:to/p:strVal', namespaces)  # Get the value being set
+                        value_elem = backend.find('to_value', parent_node)  # Get the value being set
                         value = value_elem.get('val') if value_elem is not None else None
                         animations.append({
                             # 'id': anim_id,
@@ -373,8 +642,11 @@ def extract_animations_and_behaviors(element, parent_map, animations):
 
 
 # Function to extract transitions
-def extract_transitions(element, transitions):
-    for transition in element.findall('.//p:transition', namespaces):
+def extract_transitions(element, transitions, transition_elements=None):
+    if transition_elements is None:
+        transition_elements = backend_for(element).findall('transitions', element)
+
+    for transition in transition_elements:
         # print("Transition found")
         transition_type = transition.get('type')
         duration = transition.get('dur')
@@ -383,22 +655,256 @@ def extract_transitions(element, transitions):
             'duration': duration
         })
 
-def analyze_xml(ppt_file, slide_file_name, root, anim_writer, asset_writer, relations):
+P_TGTEL = qname('p:tgtEl')
+P_SPTGT = qname('p:spTgt')
+P_ATTRNAMELST = qname('p:attrNameLst')
+P_ATTRNAME = qname('p:attrName')
+P_TO = qname('p:to')
+P_STRVAL = qname('p:strVal')
+
+# Children get_asset reads from an asset element, kept as skeletons by StreamScan
+asset_child_tags = {P_TXBODY, P_SPPR, A_BLIP, A_VIDEOFILE, A_GRAPHICDATA, P_SLDLAYOUTID, P_CLRMAP, P_SLDID}
+
+
+class AssetFrame:
+    """What get_assets_and_shapes reads from one asset element, gathered while its subtree streams past."""
+    __slots__ = ('path', 'id', 'id_attrib', 'children', 'media', 'nodes')
+
+    def __init__(self, path, id=None):
+        self.path = path
+        self.id = id
+        self.id_attrib = None  # Attributes of the first cNvPr two levels down
+        self.children = {}     # get_asset's tag -> [(position, skeleton)]
+        self.media = []        # find_media's [(path, skeleton)]
+        self.nodes = {}        # parentElements tag -> [(id, name, rows)]
+
+    def finish(self, relation):
+        """Returns this element's (id, name, asset rows), in get_assets_and_shapes order."""
+        id = self.id
+        name = "None"
+        if id is None:
+            id = self.id_attrib.get('id') if self.id_attrib is not None else get_auto_id(self.path)
+            name = self.id_attrib.get('name') if self.id_attrib is not None else "None"
+        rows = []
+        get_asset(None, rows, id, relation, self.children, self.path, self.media)
+        for tag in parentElements:
+            for child_id, child_name, child_rows in self.nodes.get(tag, ()):
+                rows.append(Asset(
+                    id=child_id,
+                    parentId=id,
+                    name=child_name,
+                    type=parentElements[tag],
+                    value="None"
+                ))
+                rows.extend(child_rows)
+        return id, name, rows
+
+
+class OpenElement:
+    """An element StreamScan has seen start but not end."""
+    __slots__ = ('element', 'position', 'child_count', 'frame', 'skeleton', 'text_target',
+                 'behavior', 'mini', 'behaviors', 'to_value')
+
+    def __init__(self, element, position):
+        self.element = element
+        self.position = position
+        self.child_count = 0
+        self.frame = None        # AssetFrame, if this is an asset element
+        self.skeleton = None     # Copy of a get_asset child, holding only what get_asset reads
+        self.text_target = None  # Skeleton element that gets this element's text when it ends
+        self.behavior = None     # Skeleton of this p:cBhvr
+        self.mini = None         # Skeleton of this element, if it is the parent of a p:cBhvr
+        self.behaviors = []      # (slot, skeleton) of its p:cBhvr children
+        self.to_value = None     # Attributes of its first ./p:to/p:strVal
+
+
+class StreamScan:
+    """Extracts a part's animations, transitions and assets from iterparse events.
+
+    Every element is cleared and detached when it ends, so memory is bounded by
+    the depth of the part and the rows found rather than its element count. For
+    each asset element the scan keeps only what get_asset and get_assets_and_shapes
+    read (first text, geometry, blips, media paths, the first cNvPr), and for each
+    p:cBhvr a skeleton with its target, attribute name and the parent's p:to
+    value. The existing extractors then run on those, so the rows match
+    TreeScan's exactly.
+    """
+    def __init__(self, source, relation):
+        self.tag_counts = Counter()
+        self.animations = []
+        self.transitions = []
+        self.assets = []
+        slots = []
+        stack = []
+
+        for event, element in xml_backend.iterparse(source, ('start', 'end')):
+            if event == 'start':
+                if not stack:
+                    entry = OpenElement(element, 0)
+                    entry.frame = AssetFrame('', "Root")
+                    stack.append(entry)
+                    continue
+                self.start(element, stack, slots)
+            else:
+                self.end(element, stack, slots, relation)
+
+        for found in slots:
+            self.animations.extend(found)
+
+    def start(self, element, stack, slots):
+        depth = len(stack)
+        parent = stack[-1]
+        entry = OpenElement(element, parent.child_count)
+        parent.child_count += 1
+        stack.append(entry)
+        tag = element.tag
+        self.tag_counts[tag] += 1
+
+        # Assets: children of asset elements, and the parts of them get_asset reads
+        if parent.frame is not None:
+            if tag in parentElements:
+                entry.frame = AssetFrame(child_path(parent.frame.path, entry.position))
+            elif tag in asset_child_tags:
+                entry.skeleton = xml_backend.Element(tag, dict(element.attrib))
+                parent.frame.children.setdefault(tag, []).append((entry.position, entry.skeleton))
+        elif parent.skeleton is not None:
+            if parent.element.tag == P_SPPR:
+                if tag in (A_PRSTGEOM, A_CUSTGEOM) and find_child(parent.skeleton, tag) is None:
+                    xml_backend.SubElement(parent.skeleton, tag, dict(element.attrib))
+            elif parent.element.tag == A_GRAPHICDATA:
+                xml_backend.SubElement(parent.skeleton, tag)
+
+        if tag == A_T and depth >= 4 and parent.element.tag == A_R:
+            text_body = stack[depth - 3]
+            if text_body.skeleton is not None and text_body.element.tag == P_TXBODY and not len(text_body.skeleton):
+                run = xml_backend.SubElement(xml_backend.SubElement(text_body.skeleton, 'p'), A_R)
+                entry.text_target = xml_backend.SubElement(run, A_T)
+        elif tag == P_CNVPR and depth >= 2:
+            frame = stack[depth - 2].frame
+            if frame is not None and frame.id_attrib is None:
+                frame.id_attrib = dict(element.attrib)
+        elif tag == P14_MEDIA and depth >= 5 and stack[depth - 2].element.tag == P_EXTLST:
+            frame = stack[depth - 5].frame
+            if frame is not None:
+                media_path = child_path(frame.path, *(stack[i].position for i in range(depth - 4, depth + 1)))
+                frame.media.append((media_path, xml_backend.Element(tag, dict(element.attrib))))
+
+        # Animations and transitions
+        elif tag == P_CBHVR:
+            if parent.mini is None:
+                parent.mini = xml_backend.Element(parent.element.tag, dict(parent.element.attrib))
+            entry.behavior = xml_backend.SubElement(parent.mini, tag)
+            parent.behaviors.append((len(slots), entry.behavior))
+            slots.append(())
+        elif tag == P_SPTGT and depth >= 2 and parent.element.tag == P_TGTEL:
+            behavior = stack[depth - 2].behavior
+            if behavior is not None and find_child(behavior, P_TGTEL) is None:
+                xml_backend.SubElement(xml_backend.SubElement(behavior, P_TGTEL), tag, dict(element.attrib))
+        elif tag == P_ATTRNAME and depth >= 2 and parent.element.tag == P_ATTRNAMELST:
+            behavior = stack[depth - 2].behavior
+            if behavior is not None and find_child(behavior, P_ATTRNAMELST) is None:
+                entry.text_target = xml_backend.SubElement(xml_backend.SubElement(behavior, P_ATTRNAMELST), tag)
+        elif tag == P_STRVAL and depth >= 2 and parent.element.tag == P_TO:
+            if stack[depth - 2].to_value is None:
+                stack[depth - 2].to_value = dict(element.attrib)
+        elif tag == P_TRANSITION:
+            extract_transitions(None, self.transitions, [element])
+
+    def end(self, element, stack, slots, relation):
+        entry = stack.pop()
+        if entry.text_target is not None:
+            entry.text_target.text = element.text
+
+        if entry.mini is not None:
+            if entry.to_value is not None:
+                xml_backend.SubElement(xml_backend.SubElement(entry.mini, P_TO), P_STRVAL, entry.to_value)
+            for slot, behavior in entry.behaviors:
+                found = []
+                extract_animations_and_behaviors(entry.mini, {behavior: entry.mini}, found, [behavior])
+                slots[slot] = found
+
+        if entry.frame is not None:
+            id, name, rows = entry.frame.finish(relation)
+            if stack:
+                stack[-1].frame.nodes.setdefault(element.tag, []).append((id, name, rows))
+            else:
+                self.assets = rows
+
+        element.clear()
+        if stack:
+            stack[-1].element.remove(element)
+
+def iter_streamed_xml_records(ppt_file, slide_file_name, source, relations, stats=None, extract_filter=None):
+    """iter_xml_records for a part read incrementally from source with StreamScan.
+
+    The scan extracts every kind of record in its one pass; an extract_filter
+    only drops the rows it doesn't keep.
+    """
+    with timed(stats, 'iterparse'):
+        scan = StreamScan(source, relations.get(slide_file_name))
+    anim_count = total_anim_count(None, scan.tag_counts)
+    bhvr_count = total_bhvr_count(None, scan.tag_counts)
+    if stats is not None:
+        stats.counts.update(elements=sum(scan.tag_counts.values()) + 1, animations=len(scan.animations),
+                            transitions=len(scan.transitions), assets=len(scan.assets))
+    if (bhvr_count != anim_count):
+        print(f"Animation count mismatch {len(scan.animations)}, {len(scan.transitions)}, {anim_count}, {bhvr_count}")
+
+    yield from iter_part_records(ppt_file, slide_file_name, scan.animations, scan.transitions, scan.assets, extract_filter)
+
+def iter_xml_records(ppt_file, slide_file_name, root, relations, stats=None, extract_filter=None):
+    """Yields an AnimationRecord per animation and transition and an AssetRecord per asset of one part.
+
+    stats, a run_stats.StageStats for the part, gets the time spent in each pass and what was found.
+    With an extract_filter.ExtractFilter, passes for record kinds it doesn't keep are skipped.
+    """
+    want_animations = extract_filter is None or extract_filter.wants('animations')
+    want_transitions = extract_filter is None or extract_filter.wants('transitions')
+    want_assets = extract_filter is None or extract_filter.wants('assets')
     animations = []
     transitions = []
-    parent_map = {c:p for p in root.iter() for c in p}
-    anim_count = total_anim_count(root)
-    bhvr_count = total_bhvr_count(root)
-    extract_animations_and_behaviors(root, parent_map, animations)
-    extract_transitions(root, transitions)
+    scan = None
+    if want_animations:
+        # One walk feeds the count check and both extractors
+        with timed(stats, 'anim_count'):
+            scan = TreeScan(root)
+            anim_count = total_anim_count(root, scan.tag_counts)
+            bhvr_count = total_bhvr_count(root, scan.tag_counts)
+        with timed(stats, 'extract_animations'):
+            extract_animations_and_behaviors(root, scan.parent_map, animations, scan.behaviors)
+            if want_transitions:
+                extract_transitions(root, transitions, scan.transitions)
+    elif want_transitions:
+        with timed(stats, 'extract_animations'):
+            extract_transitions(root, transitions)
     assets = []
-    get_assets_and_shapes(root, assets, "Root", relations.get(slide_file_name))
-    if (bhvr_count != anim_count):
+    if want_assets:
+        with timed(stats, 'get_assets_and_shapes'):
+            get_assets_and_shapes(root, assets, "Root", relations.get(slide_file_name))
+    if stats is not None:
+        if scan is not None:
+            stats.counts['elements'] += scan.element_count + 1
+        stats.counts.update(animations=len(animations), transitions=len(transitions), assets=len(assets))
+    if scan is not None and (bhvr_count != anim_count):
         print(f"Animation count mismatch {len(animations)}, {len(transitions)}, {anim_count}, {bhvr_count}")
 
+    yield from iter_part_records(ppt_file, slide_file_name, animations, transitions, assets, extract_filter)
+
+def iter_part_records(ppt_file, slide_file_name, animations, transitions, assets, extract_filter=None):
+    """Turns one part's extracted animations, transitions and assets into records, in CSV order.
+
+    With an extract_filter, only the kinds and asset types it keeps are turned into records.
+    """
+    if extract_filter is not None:
+        animations = animations if extract_filter.wants('animations') else ()
+        transitions = transitions if extract_filter.wants('transitions') else ()
+        assets = [asset for asset in assets if extract_filter.wants_asset(asset.type)] if extract_filter.wants('assets') else ()
+
+    # Fields are interned as records are built: the same deck, part, tag and
+    # attribute values repeat across thousands of rows
     # # print("Animations and Behaviors:")
     for anim in animations:
-        output = [
+        yield animation_record(
             ppt_file[1], 
             slide_file_name, 
             # anim["id"], 
@@ -406,12 +912,11 @@ def analyze_xml(ppt_file, slide_file_name, root, anim_writer, asset_writer, rela
             anim["parent_type"], 
             anim["property"], 
             anim["value"]
-        ]
-        anim_writer.writerow(output)
+        )
 
     # print("\nTransitions:")
     for trans in transitions:
-        output = [
+        yield animation_record(
             ppt_file[1], 
             slide_file_name, 
             # "None",
@@ -419,84 +924,556 @@ def analyze_xml(ppt_file, slide_file_name, root, anim_writer, asset_writer, rela
             "Transition",
             trans["type"], 
             trans["duration"]
-        ]
-        anim_writer.writerow(output)
+        )
 
     for asset in assets:
-        output = [
+        yield asset_record(
             ppt_file[1], 
             slide_file_name,
-            asset["id"],
-            asset["parentId"],
-            asset["name"],
-            asset["type"],
-            asset["value"] 
-        ]
-        asset_writer.writerow(output)
-
-def analyze_file(ppt_file, path, typename, ppt_zip, anim_writer, asset_writer):
-    relations = {}
-    rel_files = [f for f in ppt_zip.namelist() if f.startswith(path+'_rels/'+typename) and f.endswith('.xml.rels')]
-    for rel_file in rel_files:
-        with ppt_zip.open(rel_file) as file:
-            relTree = ET.parse(file)
-            relRoot = relTree.getroot()
+            asset.id,
+            asset.parentId,
+            asset.name,
+            asset.type,
+            asset.value
+        )
+
+def analyze_xml(ppt_file, slide_file_name, root, anim_writer, asset_writer, relations):
+    for record in iter_xml_records(ppt_file, slide_file_name, root, relations):
+        if type(record) is AnimationRecord:
+            anim_writer.writerow(record)
+        else:
+            asset_writer.writerow(record)
+
+class PackageIndex:
+    """Index of a deck's zip members, built with one pass over namelist().
+
+    Maps each part type to its parts and .rels members, and parses each .rels
+    member once however many passes ask for it. For example:
+
+        index = PackageIndex(ppt_zip)
+        index.parts('ppt/slides/', 'slide')       # ['ppt/slides/slide1.xml', ...]
+        index.relations('ppt/slides/', 'slide')   # {'slide1.xml': {'rId2': '../media/image1.png'}, ...}
+    """
+    def __init__(self, ppt_zip, types=None):
+        self.ppt_zip = ppt_zip
+        self.names = ppt_zip.namelist()
+        self.rel_names = []
+        self.types = {}
+        self.parsed_rels = {}
+        if types is None:
+            types = [(path, typename) for path, typename, _ in part_types]
+        for path, typename in types:
+            self.types[path, typename] = ([], [])
+        for name in self.names:
+            if name.endswith('.rels'):
+                self.rel_names.append(name)
+            for (path, typename), (parts, rel_files) in self.types.items():
+                if name.startswith(path+typename) and name.endswith('.xml'):
+                    parts.append(name)
+                elif name.startswith(path+'_rels/'+typename) and name.endswith('.xml.rels'):
+                    rel_files.append(name)
+
+    def _type(self, path, typename):
+        # Types that weren't indexed up front get their own pass, once
+        if (path, typename) not in self.types:
+            self.types[path, typename] = (
+                [f for f in self.names if f.startswith(path+typename) and f.endswith('.xml')],
+                [f for f in self.rel_names if f.startswith(path+'_rels/'+typename) and f.endswith('.xml.rels')]
+            )
+        return self.types[path, typename]
+
+    def parts(self, path, typename):
+        """The part members of one type, e.g. every ppt/slides/slideN.xml, in zip order."""
+        return self._type(path, typename)[0]
+
+    def rel_files(self, path, typename):
+        return self._type(path, typename)[1]
+
+    def rels(self, rel_file):
+        """(rel id, target) pairs of one .rels member, in document order."""
+        if rel_file not in self.parsed_rels:
+            with self.ppt_zip.open(rel_file) as file:
+                relRoot = xml_backend.parse(file)
+            self.parsed_rels[rel_file] = [(element.get('Id'), element.get('Target'))
+                                          for element in xml_backend.findall('relationships', relRoot)]
+        return self.parsed_rels[rel_file]
+
+    def relations(self, path, typename):
+        """{part file name: {rel id: target}} for one part type, keyed like ppt/slides/ names without the folder."""
+        relations = {}
+        for rel_file in self.rel_files(path, typename):
             rel_file_name = rel_file.replace(path+'_rels/', '').replace('.rels', '')
-            relations[rel_file_name] = {}
-            for element in relRoot.findall('./rel:Relationship', namespaces):
-                relations[rel_file_name][element.get('Id')] = element.get('Target')
-
-    # List all slide XML files in the ppt/slides directory
-    type_files = [f for f in ppt_zip.namelist() if f.startswith(path+typename) and f.endswith('.xml')]
-
-    for type_file in type_files:
-        with ppt_zip.open(type_file) as file:
-            type_file_name = type_file.replace(path, '')
-            tree = ET.parse(file)
-            root = tree.getroot()
-            analyze_xml(ppt_file, type_file_name, root, anim_writer, asset_writer, relations)
-
-
-def analyze_files(ppt_file, ppt_zip, anim_writer, asset_writer, presentation_writer, layout_writer):
-    analyze_file(ppt_file, 'ppt/', 'presentation', ppt_zip, anim_writer, presentation_writer)
-    analyze_file(ppt_file, 'ppt/slideMasters/', 'slideMaster', ppt_zip, anim_writer, presentation_writer)
-    analyze_file(ppt_file, 'ppt/slideLayouts/', 'slideLayout', ppt_zip, anim_writer, layout_writer)
-    analyze_file(ppt_file, 'ppt/slides/', 'slide', ppt_zip, anim_writer, asset_writer)
+            relations[rel_file_name] = dict(self.rels(rel_file))
+        return relations
+
+    def relationships(self):
+        """Yields (part, rel id, target) for every relationship in the package."""
+        for rel_file in self.rel_names:
+            part = rel_file.replace('_rels/', '')[:-len('.rels')]
+            for rel_id, target in self.rels(rel_file):
+                yield part, rel_id, target
+
+
+def iter_cached_part_records(ppt_file, type_file, type_file_name, ppt_zip, relations, part_cache, stats=None, stream=False, extract_filter=None):
+    """Yields a part's records, reusing the rows of an identical part seen in an earlier deck.
+
+    Rows are cached per extract_filter, since a filter changes which rows a part yields.
+    """
+    with timed(stats, 'part_cache'):
+        data = ppt_zip.read(type_file)
+        key = part_key(type_file, data, relations.get(type_file_name), filter_signature(extract_filter))
+        rows = part_cache.get(key)
+    if rows is not None:
+        if stats is not None:
+            stats.counts['part_cache_hits'] += 1
+        for kind, fields in rows:
+            yield record_types[kind](ppt_file[1], *fields)
+        return
+
+    if extract_filter is not None and extract_filter.skips_data(data):
+        records = []
+        if stats is not None:
+            stats.counts['parts_skipped'] += 1
+    elif stream:
+        records = list(iter_streamed_xml_records(ppt_file, type_file_name, io.BytesIO(data), relations, stats, extract_filter))
+    else:
+        with timed(stats, 'xml_parse'):
+            root = xml_backend.fromstring(data)
+        records = list(iter_xml_records(ppt_file, type_file_name, root, relations, stats, extract_filter))
+    # Stored without the deck name, which is the only thing that differs between decks
+    part_cache.put(key, [['animation' if type(record) is AnimationRecord else 'asset', list(record[1:])]
+                         for record in records])
+    yield from records
+
+def iter_file_records(ppt_file, path, typename, ppt_zip, stats=None, index=None, part_cache=None, stream_over=None, extract_filter=None):
+    """Yields the records of every part of one type, e.g. every ppt/slides/slideN.xml.
+
+    With a part_cache.PartCache, parts already extracted from another deck are not
+    parsed again. Parts of at least stream_over bytes, uncompressed, are read with
+    StreamScan instead of being parsed into a tree. Parts an extract_filter doesn't
+    select are not read, and when it keeps no assets, parts without a behavior or
+    transition in their XML are not parsed.
+    """
+    if index is None:
+        index = PackageIndex(ppt_zip, [(path, typename)])
+    with timed(stats, 'rels_parse'):
+        relations = index.relations(path, typename)
+
+    for type_file in index.parts(path, typename):
+        type_file_name = type_file.replace(path, '')
+        if extract_filter is not None and not extract_filter.wants_part(typename, type_file_name):
+            continue
+        part_stats = stats.part(type_file) if stats is not None else None
+        stream = stream_over is not None and ppt_zip.getinfo(type_file).file_size >= stream_over
+        if part_cache is not None:
+            yield from iter_cached_part_records(ppt_file, type_file, type_file_name, ppt_zip, relations,
+                                                part_cache, part_stats, stream, extract_filter)
+            continue
+        if stream:
+            with ppt_zip.open(type_file) as file:
+                yield from iter_streamed_xml_records(ppt_file, type_file_name, file, relations, part_stats, extract_filter)
+            continue
+        if extract_filter is not None and not extract_filter.wants('assets'):
+            # Only animations are kept: look for them in the bytes before parsing
+            with timed(part_stats, 'xml_parse'):
+                data = ppt_zip.read(type_file)
+                root = None if extract_filter.skips_data(data) else xml_backend.fromstring(data)
+            if root is None:
+                if part_stats is not None:
+                    part_stats.counts['parts_skipped'] += 1
+                continue
+        else:
+            with timed(part_stats, 'xml_parse'), ppt_zip.open(type_file) as file:
+                root = xml_backend.parse(file)
+        yield from iter_xml_records(ppt_file, type_file_name, root, relations, part_stats, extract_filter)
+
+def analyze_file(ppt_file, path, typename, ppt_zip, anim_writer, asset_writer, index=None):
+    for record in iter_file_records(ppt_file, path, typename, ppt_zip, index=index):
+        if type(record) is AnimationRecord:
+            anim_writer.writerow(record)
+        else:
+            asset_writer.writerow(record)
+
+
+def iter_deck_records(ppt_file, ppt_zip, stats=None, index=None, options=None):
+    """Yields (table, record) pairs for a whole deck, where table names the CSV the record belongs in.
+
+    Every pass shares one PackageIndex of the deck, built here unless one is passed in.
+    With the part_cache of a RunOptions, masters and layouts shared with earlier decks
+    reuse their rows; with its extract_filter, part types the filter doesn't select are
+    skipped along with their rels.
+    """
+    if options is None:
+        options = RunOptions()
+    extract_filter = options.extract_filter
+    if index is None:
+        with timed(stats, 'index'):
+            index = PackageIndex(ppt_zip)
+    for path, typename, table in part_types:
+        if extract_filter is not None and not extract_filter.wants_type(typename):
+            continue
+        type_cache = options.part_cache if typename in cached_part_types else None
+        for record in iter_file_records(ppt_file, path, typename, ppt_zip, stats, index, type_cache, options.stream_over, extract_filter):
+            yield ('animation' if type(record) is AnimationRecord else table), record
+
+def analyze_files(ppt_file, ppt_zip, anim_writer, asset_writer, presentation_writer, layout_writer, stats=None, options=None, index=None):
+    writers = {
+        'animation': anim_writer,
+        'asset': asset_writer,
+        'presentation': presentation_writer,
+        'layout': layout_writer
+    }
+    for table, record in iter_deck_records(ppt_file, ppt_zip, stats, index, options):
+        writers[table].writerow(record)
     
 
-def unzip_pptx(ppt_file, anim_writer, asset_writer, presentation_writer, layout_writer):
-    """Extracts and prints contents of slides from a PowerPoint file."""
+def read_relationships(path):
+    try:
+        with zipfile.ZipFile(path, 'r') as ppt_zip:
+            return list(PackageIndex(ppt_zip, []).relationships())
+    except (OSError, zipfile.BadZipFile) + xml_backend.parse_errors:
+        return []
+
+def unzip_pptx(ppt_file, anim_writer, asset_writer, presentation_writer, layout_writer, stats=None, options=None, package=None):
+    """Extracts and prints contents of slides from a PowerPoint file.
+
+    options is the RunOptions the deck is extracted with. With a package dict, the deck's zip digest and its (part, rel id, target)
+    relationships are added to it under 'digest' and 'relationships', taken
+    from the PackageIndex the extraction already built.
+    """
     try:
-        with zipfile.ZipFile(ppt_file[0], 'r') as ppt_zip:
+        with timed(stats, 'zip_open'):
+            ppt_zip = zipfile.ZipFile(ppt_file[0], 'r')
+        with ppt_zip:
             # print(f"Processing {ppt_file[0]}")
-            analyze_files(ppt_file, ppt_zip, anim_writer, asset_writer, presentation_writer, layout_writer)
+            with timed(stats, 'index'):
+                index = PackageIndex(ppt_zip)
+            analyze_files(ppt_file, ppt_zip, anim_writer, asset_writer, presentation_writer, layout_writer, stats, options, index)
+            if package is not None:
+                package['digest'] = zip_digest(ppt_zip)
+                package['relationships'] = list(index.relationships())
+        return True
     except Exception as e:
         print(f"Error processing {ppt_file[0]}: {e}")
         traceback.print_exc()
+        return False
+
+def matches_any(relative_path, patterns):
+    # Patterns match the path below the crawled directory, with / separators
+    return any(fnmatch.fnmatch(relative_path, pattern) for pattern in patterns)
+
+def iter_ppt_files(directory, include=None, exclude=None, max_depth=None):
+    """Yields [path, name] for each .pptx file below directory as soon as its folder is read.
+
+    Decks come out in the same order as os.walk's top-down walk. include and
+    exclude are glob patterns matched against the path below directory, e.g.
+    'archive/*' or '*draft*'; an excluded folder is not read at all. max_depth
+    limits how many folders deep the crawl goes, 0 being directory itself.
+    """
+    folders = [(directory, '', 0)]
+    while folders:
+        folder, relative_folder, depth = folders.pop()
+        try:
+            with os.scandir(folder) as entries:
+                entries = list(entries)
+        except OSError:
+            # os.walk skips folders it can't read as well
+            continue
+
+        subfolders = []
+        for entry in entries:
+            relative_path = relative_folder + entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if entry.is_symlink() or (max_depth is not None and depth >= max_depth):
+                    continue
+                if exclude and matches_any(relative_path, exclude):
+                    continue
+                subfolders.append((entry.path, relative_path + '/', depth + 1))
+            elif entry.name.endswith('.pptx') and not entry.name.startswith('~$'):
+                if include and not matches_any(relative_path, include):
+                    continue
+                if exclude and matches_any(relative_path, exclude):
+                    continue
+                yield [os.path.join(folder, entry.name), entry.name]
+
+        # Popped from the end, so the first subfolder is crawled next
+        folders.extend(reversed(subfolders))
 
-def find_ppt_files(directory):
+def find_ppt_files(directory, include=None, exclude=None, max_depth=None):
     """Finds all .pptx files in the given directory."""
-    ppt_files = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.pptx') and not file.startswith('~$'):
-                ppt_files.append([os.path.join(root, file), file])
-    return ppt_files
-
-def process_presentations(directory, anim_writer, asset_writer, presentation_writer, layout_writer):
-    """Processes all PowerPoint presentations in the specified directory."""
-    ppt_files = find_ppt_files(directory)
-    if not ppt_files:
-        print("No PowerPoint (.pptx) files found in the directory.")
-        return
-    
+    return list(iter_ppt_files(directory, include, exclude, max_depth))
+
+class RowBuffer:
+    """Collects rows in memory in place of a csv.writer."""
+    def __init__(self):
+        self.rows = []
+
+    def writerow(self, row):
+        self.rows.append(row)
+
+
+class TeeWriter:
+    """Forwards every row to several writers."""
+    def __init__(self, *writers):
+        self.writers = writers
+
+    def writerow(self, row):
+        for writer in self.writers:
+            writer.writerow(row)
+
+    def writerows(self, rows):
+        for writer in self.writers:
+            writer.writerows(rows)
+
+
+class RunOptions(namedtuple('RunOptions', ['part_cache', 'stream_over', 'extract_filter', 'instrument', 'with_package'],
+                            defaults=[None, None, None, False, False])):
+    """How every deck of a run is extracted.
+
+    part_cache is a part_cache.PartCache shared by the decks extracted in one
+    process. Parts of at least stream_over bytes are read with StreamScan.
+    extract_filter is an extract_filter.ExtractFilter. instrument collects a
+    DeckStats per deck, and with_package the deck's 'digest' and 'relationships'
+    (see unzip_pptx).
+    """
+    __slots__ = ()
+
+
+# The RunOptions of a pool worker, set once by init_worker so that its copy of the
+# part cache is shared by every deck the worker extracts
+worker_options = None
+
+def init_worker(options, backend=None):
+    """Process pool initializer; each worker keeps its own copy of the options and parses with backend."""
+    global worker_options
+    worker_options = options
+    if backend is not None:
+        use_xml_backend(backend)
+
+def extract_deck(ppt_file, options=None):
+    """Extracts one presentation and returns its animation, asset, presentation and layout rows,
+    whether it was processed without errors, its DeckStats when options.instrument is set, and when
+    options.with_package is set a dict of its 'digest' and 'relationships' (see unzip_pptx)."""
+    if options is None:
+        options = RunOptions()
+    anim_rows, asset_rows, presentation_rows, layout_rows = RowBuffer(), RowBuffer(), RowBuffer(), RowBuffer()
+    stats = DeckStats(ppt_file) if options.instrument else None
+    package = {} if options.with_package else None
+    with timed(stats, 'extract'):
+        ok = unzip_pptx(ppt_file, anim_rows, asset_rows, presentation_rows, layout_rows, stats, options, package)
+    if stats is not None:
+        stats.ok = ok
+    return (anim_rows.rows, asset_rows.rows, presentation_rows.rows, layout_rows.rows), ok, stats, package
+
+def extract_worker_deck(ppt_file):
+    """extract_deck with the options init_worker gave this pool worker."""
+    return extract_deck(ppt_file, worker_options)
+
+def finish_deck(ppt_file, hit, future, manifest, options):
+    """Returns (ppt_file, rows, ok, stats, package) for a deck taken off extract_decks' queue."""
+    if hit:
+        stats = DeckStats(ppt_file) if options.instrument else None
+        with timed(stats, 'extract'):
+            rows = manifest.load(ppt_file[0])
+        if stats is not None:
+            stats.cached = True
+        # The manifest hashed the deck to find it unchanged; its relationships weren't read
+        package = {'digest': manifest.digests.get(os.path.abspath(ppt_file[0]))} if options.with_package else None
+        return ppt_file, rows, True, stats, package
+
+    if future is not None:
+        rows, ok, stats, package = future.result()
+    else:
+        rows, ok, stats, package = extract_deck(ppt_file, options)
+    # Decks that failed part way are extracted again on the next run
+    if manifest is not None and ok:
+        manifest.store(ppt_file[0], rows)
+    return ppt_file, rows, ok, stats, package
+
+def extract_decks(ppt_files, options=None, *, workers=1, manifest=None, max_in_flight=None):
+    """Yields (ppt_file, rows, ok, stats, package) for each deck in order, reusing the manifest's rows for unchanged decks.
+
+    ppt_files can be a generator such as iter_ppt_files: each deck is handed to a
+    worker as soon as it is found, with at most max_in_flight decks (default four
+    per worker) queued, so extraction overlaps the crawl. ok is False for a deck
+    that failed part way. Every deck is extracted with the RunOptions options,
+    which are copied into each worker once; the manifest should have been opened
+    with the signature of its extract_filter. stats is a DeckStats when
+    options.instrument is set and None otherwise. package is None unless
+    options.with_package is set; then it holds the deck's 'digest' and, for
+    decks that were extracted, its 'relationships', gathered in the worker.
+    """
+    if options is None:
+        options = RunOptions()
+    executor = None
+    if workers == 1:
+        max_in_flight = 1
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers or None, initializer=init_worker, initargs=(options, xml_backend.name))
+        max_in_flight = max_in_flight or 4 * (workers or os.cpu_count() or 1)
+
+    # Decks leave the queue in the order they were found, so the CSVs come out
+    # exactly as they would from a serial run.
+    in_flight = deque()
+    try:
+        for ppt_file in ppt_files:
+            hit = manifest is not None and manifest.lookup(ppt_file[0])
+            future = None
+            if not hit and executor is not None:
+                future = executor.submit(extract_worker_deck, ppt_file)
+            in_flight.append((ppt_file, hit, future))
+
+            # Write out finished decks while the crawl goes on, and wait once the queue is full
+            while in_flight and (len(in_flight) >= max_in_flight or in_flight[0][1]
+                                 or (in_flight[0][2] is not None and in_flight[0][2].done())):
+                yield finish_deck(*in_flight.popleft(), manifest, options)
+
+        while in_flight:
+            yield finish_deck(*in_flight.popleft(), manifest, options)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+def iter_unfinished(ppt_files, journal, found):
+    """Yields the decks the journal has no committed rows for, collecting every deck in found."""
     for ppt_file in ppt_files:
-        # print(f"Processing {ppt_file}...")
-        unzip_pptx(ppt_file, anim_writer, asset_writer, presentation_writer, layout_writer)
+        found.append(ppt_file)
+        if not journal.is_done(ppt_file):
+            yield ppt_file
+
+def process_presentations(directory, anim_writer, asset_writer, presentation_writer, layout_writer, options=None, *,
+                          workers=1, manifest=None, store=None, stats_log=None, journal=None, include=None, exclude=None, max_depth=None):
+    """Processes all PowerPoint presentations in the specified directory.
+
+    Decks are extracted while the directory is still being crawled; include,
+    exclude and max_depth are passed to iter_ppt_files. With a run_stats.StatsLog,
+    each deck's timings and counts are written to it as the deck is written out.
+
+    With a run_journal.RunJournal, decks an earlier run finished are skipped, each
+    deck's rows are committed to the journal instead of the writers, and the
+    writers get every committed deck in crawl order at the end. Rows of decks
+    that fail part way are dropped rather than written.
+
+    options is the RunOptions every deck is extracted with; its extract_filter
+    narrows what is extracted from each deck, and the manifest, journal and store
+    should be opened with the filter's signature. Whether stats and packages are
+    collected follows from stats_log and store.
+    """
+    if options is None:
+        options = RunOptions()
+    options = options._replace(instrument=stats_log is not None, with_package=store is not None)
+    ppt_files = iter_ppt_files(directory, include, exclude, max_depth)
+    found = []
+    if journal is not None:
+        ppt_files = iter_unfinished(ppt_files, journal, found)
+    deck_count = 0
+    
+    try:
+        for ppt_file, rows, ok, stats, package in extract_decks(ppt_files, options, workers=workers, manifest=manifest):
+            deck_count += 1
+            if journal is not None:
+                with timed(stats, 'journal_write'):
+                    journal.record(ppt_file, rows, ok)
+                if not ok:
+                    print(f"Skipped {ppt_file[0]}; its rows were not written")
+            else:
+                anim_rows, asset_rows, presentation_rows, layout_rows = rows
+                with timed(stats, 'csv_write'):
+                    anim_writer.writerows(anim_rows)
+                    asset_writer.writerows(asset_rows)
+                    presentation_writer.writerows(presentation_rows)
+                    layout_writer.writerows(layout_rows)
+            if store is not None and (ok or journal is None):
+                with timed(stats, 'sqlite_write'):
+                    # Failed decks are stored without a digest, so the next run writes them again
+                    digest = package.get('digest') if ok else None
+                    if not store.is_current(ppt_file, digest):
+                        relationships = package.get('relationships')
+                        if relationships is None:
+                            relationships = read_relationships(ppt_file[0])
+                        store.write_deck(ppt_file, rows, relationships, digest)
+            if stats_log is not None:
+                stats_log.write(stats)
+
+        if journal is not None:
+            deck_count = len(found)
+            journal.merge(found, anim_writer, asset_writer, presentation_writer, layout_writer)
+    finally:
+        if manifest is not None:
+            manifest.save()
+        if stats_log is not None:
+            stats_log.close()
+        if journal is not None:
+            journal.close()
+
+    if not deck_count:
+        print("No PowerPoint (.pptx) files found in the directory.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract animations and assets from PowerPoint presentations.")
+    parser.add_argument("directory", help="directory searched recursively for .pptx files")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only process decks whose path below the directory matches GLOB; may be repeated")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="skip decks and folders whose path below the directory matches GLOB; may be repeated")
+    parser.add_argument("--max-depth", type=int, metavar="N",
+                        help="crawl at most N folders below the directory (default: no limit)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes; 0 uses every core (default: 1, serial)")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="keep a manifest of extracted decks in DIR and reuse the rows of unchanged decks")
+    parser.add_argument("--columnar", action="store_true",
+                        help="also write each table in a dictionary-encoded columnar format "
+                             "(Parquet when pyarrow is installed, .cols otherwise)")
+    parser.add_argument("--sqlite", metavar="PATH",
+                        help="also store decks, slides, assets, animations and relationships in an indexed SQLite database")
+    parser.add_argument("--stats", metavar="PATH",
+                        help="write per-deck and per-part timings and counts to PATH as JSON lines, "
+                             "and print the slowest decks at the end")
+    parser.add_argument("--resume", metavar="DIR",
+                        help="journal progress and each deck's rows in DIR, so an interrupted run started again "
+                             "with the same DIR skips finished decks; the CSVs are written from DIR at the end")
+    parser.add_argument("--stream-over", type=int, metavar="BYTES",
+                        help="read parts of at least BYTES (uncompressed) incrementally "
+                             "with iterparse, in memory bounded by their depth; 0 streams every part")
+    parser.add_argument("--xml-backend", choices=['lxml', 'etree'],
+                        help="parse parts with lxml or with the standard library's ElementTree; "
+                             "both give the same rows (default: lxml when it is installed)")
+    parser.add_argument("--parts", action="append", choices=[typename for _, typename, _ in part_types],
+                        help="only extract parts of this type; may be repeated (default: every type)")
+    parser.add_argument("--slides", metavar="RANGE",
+                        help="only extract slides numbered in RANGE, e.g. 3, 3-7 or 5-; other part types are unaffected")
+    parser.add_argument("--only", action="append", choices=RECORD_KINDS,
+                        help="only extract this kind of record; may be repeated (default: every kind)")
+    parser.add_argument("--asset-type", action="append", metavar="TYPE",
+                        help="only keep asset rows of this Type, e.g. Image, Video or Media; may be repeated")
+    parser.add_argument("--part-cache", type=int, default=256, metavar="N",
+                        help="reuse the rows of up to N slide layouts and masters shared between decks "
+                             "instead of parsing them again; 0 turns this off (default: 256)")
+    parser.add_argument("--part-cache-dir", metavar="DIR",
+                        help="also keep the layout and master rows in DIR, for later runs and other workers")
+    args = parser.parse_args()
+    if args.xml_backend:
+        try:
+            use_xml_backend(args.xml_backend)
+        except ValueError as e:
+            parser.error(str(e))
+    extract_filter = None
+    if args.parts or args.slides or args.only or args.asset_type:
+        try:
+            extract_filter = ExtractFilter(args.parts, parse_slide_range(args.slides) if args.slides else None,
+                                           args.only, args.asset_type)
+        except ValueError as e:
+            parser.error(str(e))
+
     # Input directory path
-    directory_path = str(sys.argv[1])
+    directory_path = args.directory
+    manifest = DeckManifest(args.cache, filter_signature(extract_filter)) if args.cache else None
+    part_cache = PartCache(args.part_cache, args.part_cache_dir) if args.part_cache else None
     
     if os.path.isdir(directory_path):
         # Writing to a CSV file
@@ -510,32 +1487,38 @@ if __name__ == "__main__":
                     with open('asset.csv', mode='w', newline='') as asset_file:
                         asset_writer = csv.writer(asset_file)
 
-                        output = [
-                            "PPTX", 
-                            "Slide", 
-                            # "Anim ID",
-                            "Target ID", 
-                            "Animation", 
-                            "Property", 
-                            "Value"
-                        ]
-                        anim_writer.writerow(output)
-
-                        output = [
-                            "Pptx", 
-                            "Slide", 
-                            "Asset",
-                            "Parent", 
-                            "Name", 
-                            "Type", 
-                            "Value"
-                        ]
-                        asset_writer.writerow(output)
-                        presentation_writer.writerow(output)
-                        layout_writer.writerow(output)
-
-
-                        process_presentations(directory_path, anim_writer, asset_writer, presentation_writer, layout_writer)
+                        anim_writer.writerow(ANIMATION_HEADER)
+                        asset_writer.writerow(ASSET_HEADER)
+                        presentation_writer.writerow(ASSET_HEADER)
+                        layout_writer.writerow(ASSET_HEADER)
+
+                        columnar_writers = []
+                        if args.columnar:
+                            # Columnar copies of the four tables, written alongside the CSVs
+                            columnar_writers = [
+                                ColumnarWriter(table_path('animation'), ANIMATION_HEADER),
+                                ColumnarWriter(table_path('asset'), ASSET_HEADER),
+                                ColumnarWriter(table_path('presentation'), ASSET_HEADER),
+                                ColumnarWriter(table_path('layout'), ASSET_HEADER)
+                            ]
+                            anim_writer = TeeWriter(anim_writer, columnar_writers[0])
+                            asset_writer = TeeWriter(asset_writer, columnar_writers[1])
+                            presentation_writer = TeeWriter(presentation_writer, columnar_writers[2])
+                            layout_writer = TeeWriter(layout_writer, columnar_writers[3])
+
+                        store = SqliteStore(args.sqlite, filter_signature(extract_filter)) if args.sqlite else None
+                        try:
+                            stats_log = StatsLog(args.stats) if args.stats else None
+                            options = RunOptions(part_cache=part_cache, stream_over=args.stream_over, extract_filter=extract_filter)
+                            process_presentations(directory_path, anim_writer, asset_writer, presentation_writer, layout_writer, options,
+                                                  workers=args.workers, manifest=manifest, store=store, stats_log=stats_log,
+                                                  journal=RunJournal(args.resume, filter_signature(extract_filter)) if args.resume else None,
+                                                  include=args.include, exclude=args.exclude, max_depth=args.max_depth)
+                        finally:
+                            for columnar_writer in columnar_writers:
+                                columnar_writer.close()
+                            if store is not None:
+                                store.close()
         #             xml_data = """\                                                                                                                                         </p:sld>
         # """
                 # ppt_file = ["File", "file"]
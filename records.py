@@ -0,0 +1,81 @@
+import sys
+from collections import namedtuple
+
+# Column headers of animation.csv and of asset.csv, presentation.csv and layout.csv
+ANIMATION_HEADER = [
+    "PPTX",
+    "Slide",
+    # "Anim ID",
+    "Target ID",
+    "Animation",
+    "Property",
+    "Value"
+]
+ASSET_HEADER = [
+    "Pptx",
+    "Slide",
+    "Asset",
+    "Parent",
+    "Name",
+    "Type",
+    "Value"
+]
+
+
+def intern_text(value):
+    """sys.intern for strings; None and the tuple names of graphic data pass through unchanged."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class CsvRow:
+    """Read-only mapping view of a record, keyed by its CSV header.
+
+    Records index by position like the tuples they are, and by column name
+    like the csv.DictReader rows the JSON builders read, so the builders take
+    either without a dict being built per row. dict(record) gives that row.
+    """
+    __slots__ = ()
+    header = []
+    columns = {}
+
+    def __getitem__(self, key):
+        if type(key) is str:
+            return tuple.__getitem__(self, self.columns[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self.columns.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self.header
+
+    def items(self):
+        return zip(self.header, self)
+
+
+class AnimationRecord(CsvRow, namedtuple('AnimationRecord', ['pptx', 'slide', 'target', 'animation', 'property', 'value'])):
+    """One row of animation.csv."""
+    __slots__ = ()
+    header = ANIMATION_HEADER
+    columns = {name: index for index, name in enumerate(ANIMATION_HEADER)}
+
+
+class AssetRecord(CsvRow, namedtuple('AssetRecord', ['pptx', 'slide', 'asset', 'parent', 'name', 'type', 'value'])):
+    """One row of asset.csv, presentation.csv or layout.csv."""
+    __slots__ = ()
+    header = ASSET_HEADER
+    columns = {name: index for index, name in enumerate(ASSET_HEADER)}
+
+
+record_types = {'animation': AnimationRecord, 'asset': AssetRecord}
+
+def animation_record(pptx, slide, target, animation, property, value):
+    """Builds an AnimationRecord with its fields interned; they come from a small set of values."""
+    return AnimationRecord(intern_text(pptx), intern_text(slide), intern_text(target), intern_text(animation),
+                           intern_text(property), intern_text(value))
+
+def asset_record(pptx, slide, asset, parent, name, type, value):
+    """Builds an AssetRecord with its fields interned, except the value of Text assets, which rarely repeats."""
+    return AssetRecord(intern_text(pptx), intern_text(slide), intern_text(asset), intern_text(parent), intern_text(name),
+                       intern_text(type), value if type == "Text" else intern_text(value))
@@ -0,0 +1,95 @@
+import os
+import json
+import hashlib
+
+
+def fsync_write(path, data):
+    """Writes data next to path, flushes it to disk and renames it into place."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as temp_file:
+        temp_file.write(data)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_path, path)
+
+
+class RunJournal:
+    """Progress journal and per-deck row fragments for resumable pptxsir runs.
+
+    Each finished deck's rows are committed to directory/fragments/<hash of the
+    deck path>.json before a line saying so is appended to directory/journal.jsonl
+    and synced, so a run that is killed can be started again with the same
+    directory and only extracts the decks that hadn't finished. A deck is only
+    skipped if its size and modification time are unchanged. Decks that failed
+    are journalled too, but their rows are dropped and they are retried on the
+    next run. merge() writes the fragments out in deck order at the end.
+    signature names the extract filter of the run; decks finished under
+    another filter are extracted again.
+    """
+    def __init__(self, directory, signature=None):
+        self.directory = directory
+        self.signature = signature
+        self.fragments_dir = os.path.join(directory, 'fragments')
+        self.journal_path = os.path.join(directory, 'journal.jsonl')
+        os.makedirs(self.fragments_dir, exist_ok=True)
+
+        # Deck path -> its latest journal entry; a torn last line is ignored
+        self.entries = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry['path']] = entry
+        self.journal_file = open(self.journal_path, 'a', encoding='utf-8')
+
+    def fragment_path(self, path):
+        return os.path.join(self.fragments_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + '.json')
+
+    def deck_state(self, ppt_file):
+        path = os.path.abspath(ppt_file[0])
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return path, None, None
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def is_done(self, ppt_file):
+        """Whether an earlier run committed this deck's rows and the deck hasn't changed since."""
+        path, size, mtime = self.deck_state(ppt_file)
+        entry = self.entries.get(path)
+        return (entry is not None and entry['status'] == 'done' and entry['size'] == size
+                and entry['mtime'] == mtime and entry.get('filter') == self.signature
+                and os.path.exists(self.fragment_path(path)))
+
+    def record(self, ppt_file, rows, ok):
+        """Commits a deck's rows, or notes that it failed, and syncs the journal line."""
+        path, size, mtime = self.deck_state(ppt_file)
+        if ok:
+            fsync_write(self.fragment_path(path), json.dumps(rows))
+        entry = {'path': path, 'status': 'done' if ok else 'failed', 'size': size, 'mtime': mtime}
+        if self.signature is not None:
+            entry['filter'] = self.signature
+        self.entries[path] = entry
+        self.journal_file.write(json.dumps(entry) + '\n')
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+
+    def merge(self, ppt_files, anim_writer, asset_writer, presentation_writer, layout_writer):
+        """Writes the committed rows of ppt_files, in that order, to the four writers."""
+        for ppt_file in ppt_files:
+            path = os.path.abspath(ppt_file[0])
+            entry = self.entries.get(path)
+            if entry is None or entry['status'] != 'done':
+                continue
+            with open(self.fragment_path(path), 'r', encoding='utf-8') as fragment_file:
+                anim_rows, asset_rows, presentation_rows, layout_rows = json.load(fragment_file)
+            anim_writer.writerows(anim_rows)
+            asset_writer.writerows(asset_rows)
+            presentation_writer.writerows(presentation_rows)
+            layout_writer.writerows(layout_rows)
+
+    def close(self):
+        self.journal_file.close()
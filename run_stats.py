@@ -0,0 +1,107 @@
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Stages a deck's wall time is made of: extracting it, then writing it out in the parent
+DECK_STAGES = ['extract', 'csv_write', 'journal_write', 'sqlite_write']
+
+
+class StageStats:
+    """Seconds spent per stage and counts of what was seen, for a deck or one of its parts."""
+    def __init__(self):
+        self.timings = defaultdict(float)
+        self.counts = Counter()
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] += time.perf_counter() - start
+
+
+class DeckStats(StageStats):
+    """Timings and counts for one deck, with a StageStats per part.
+
+    Built in whichever process extracts the deck and pickled back to the parent
+    along with its rows, where the CSV writing time is added.
+    """
+    def __init__(self, ppt_file):
+        super().__init__()
+        self.path = ppt_file[0]
+        self.deck = ppt_file[1]
+        self.parts = {}
+        self.ok = True
+        self.cached = False
+
+    def part(self, name):
+        self.parts[name] = StageStats()
+        return self.parts[name]
+
+    def total_seconds(self):
+        return sum(self.timings.get(stage, 0.0) for stage in DECK_STAGES)
+
+    def as_dict(self):
+        timings = defaultdict(float, self.timings)
+        counts = Counter(self.counts)
+        for part in self.parts.values():
+            for stage, seconds in part.timings.items():
+                timings[stage] += seconds
+            counts.update(part.counts)
+        counts['parts'] = len(self.parts)
+        return {
+            'deck': self.deck,
+            'path': self.path,
+            'ok': self.ok,
+            'cached': self.cached,
+            'seconds': round(self.total_seconds(), 6),
+            'timings': {stage: round(seconds, 6) for stage, seconds in timings.items()},
+            'counts': dict(counts),
+            'parts': [{'part': name,
+                       'timings': {stage: round(seconds, 6) for stage, seconds in part.timings.items()},
+                       'counts': dict(part.counts)}
+                      for name, part in self.parts.items()]
+        }
+
+
+def timed(stats, stage):
+    """stats.time(stage), or a no-op when the run isn't instrumented."""
+    return stats.time(stage) if stats is not None else nullcontext()
+
+
+class StatsLog:
+    """Writes one JSON line per deck and, on close, a summary line with the slowest decks."""
+    def __init__(self, path, slowest=10):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.slowest = slowest
+        self.decks = []
+        self.timings = defaultdict(float)
+
+    def write(self, stats):
+        record = stats.as_dict()
+        json.dump(record, self.file)
+        self.file.write('\n')
+        self.decks.append((record['seconds'], record['deck'], record['path']))
+        for stage, seconds in record['timings'].items():
+            self.timings[stage] += seconds
+
+    def summary(self):
+        slowest = sorted(self.decks, key=lambda deck: deck[0], reverse=True)[:self.slowest]
+        return {
+            'decks': len(self.decks),
+            'seconds': round(sum(deck[0] for deck in self.decks), 6),
+            'timings': {stage: round(seconds, 6) for stage, seconds in self.timings.items()},
+            'slowest': [{'deck': deck, 'path': path, 'seconds': seconds} for seconds, deck, path in slowest]
+        }
+
+    def close(self):
+        summary = self.summary()
+        json.dump({'summary': summary}, self.file)
+        self.file.write('\n')
+        self.file.close()
+
+        print(f"Slowest decks ({summary['decks']} decks, {summary['seconds']:.2f}s in total):")
+        for deck in summary['slowest']:
+            print(f"  {deck['seconds']:8.3f}s  {deck['path']}")
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+
+from deck_cache import MANIFEST_VERSION
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    digest TEXT,
+    version INTEGER,
+    filter TEXT
+);
+CREATE TABLE IF NOT EXISTS slides (
+    deck_id INTEGER NOT NULL REFERENCES decks(id),
+    slide TEXT NOT NULL,
+    part_table TEXT NOT NULL,
+    PRIMARY KEY (deck_id, slide)
+);
+CREATE TABLE IF NOT EXISTS assets (
+    deck_id INTEGER NOT NULL REFERENCES decks(id),
+    slide TEXT NOT NULL,
+    part_table TEXT NOT NULL,
+    asset TEXT,
+    parent TEXT,
+    name TEXT,
+    type TEXT,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS animations (
+    deck_id INTEGER NOT NULL REFERENCES decks(id),
+    slide TEXT NOT NULL,
+    target TEXT,
+    parent_type TEXT,
+    property TEXT,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS relationships (
+    deck_id INTEGER NOT NULL REFERENCES decks(id),
+    part TEXT NOT NULL,
+    rel_id TEXT,
+    target TEXT
+);
+CREATE INDEX IF NOT EXISTS assets_deck_slide ON assets (deck_id, slide);
+CREATE INDEX IF NOT EXISTS assets_type ON assets (type);
+CREATE INDEX IF NOT EXISTS animations_deck_slide ON animations (deck_id, slide);
+CREATE INDEX IF NOT EXISTS animations_parent_type ON animations (parent_type);
+CREATE INDEX IF NOT EXISTS relationships_deck_part ON relationships (deck_id, part);
+"""
+
+# Tables holding a deck's rows, cleared before the deck is written again
+DECK_TABLES = ['slides', 'assets', 'animations', 'relationships']
+
+# Columns added to decks since the table was first created, for databases written before them
+DECK_COLUMNS = {'version': 'INTEGER', 'filter': 'TEXT'}
+
+
+class SqliteStore:
+    """Indexed SQLite copy of the extracted rows, one transaction per deck.
+
+    Writing a deck again replaces everything previously stored for its path. A
+    deck is stored with its digest and the extractor's MANIFEST_VERSION, and
+    is_current() tells when both still match, so incremental runs only touch
+    the decks that changed. Decks that failed part way are stored without a
+    digest and are written again on the next run. signature names the extract
+    filter the rows were written under; a deck stored under another filter,
+    or none, isn't current, so a full run replaces the rows of a filtered one.
+    For example:
+
+        SELECT DISTINCT d.name FROM animations a
+        JOIN assets s ON s.deck_id = a.deck_id AND s.slide = a.slide AND s.asset = a.target
+        JOIN decks d ON d.id = a.deck_id
+        WHERE a.parent_type = 'animMotion' AND s.type = 'Picture'
+    """
+    def __init__(self, path, signature=None):
+        self.signature = signature
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(decks)')}
+        with self.connection:
+            for column, column_type in DECK_COLUMNS.items():
+                if column not in columns:
+                    self.connection.execute(f'ALTER TABLE decks ADD COLUMN {column} {column_type}')
+
+    def close(self):
+        self.connection.close()
+
+    def is_current(self, ppt_file, digest):
+        """Whether the deck is stored, complete, from the same digest, extractor version and filter."""
+        existing = self.connection.execute('SELECT digest, version, filter FROM decks WHERE path = ?',
+                                           (os.path.abspath(ppt_file[0]),)).fetchone()
+        return digest is not None and existing == (digest, MANIFEST_VERSION, self.signature)
+
+    def write_deck(self, ppt_file, rows, relationships, digest=None):
+        """Stores one deck's animation, asset, presentation and layout rows and its relationships.
+
+        relationships holds (part, rel id, target) tuples. digest is the deck's
+        deck_cache.deck_digest, or None for a deck that failed part way, which
+        is_current() then never reports as current.
+        """
+        path = os.path.abspath(ppt_file[0])
+        anim_rows, asset_rows, presentation_rows, layout_rows = rows
+        with self.connection:
+            self.connection.execute(
+                'INSERT INTO decks (path, name, digest, version, filter) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (path) DO UPDATE SET name = excluded.name, digest = excluded.digest, '
+                'version = excluded.version, filter = excluded.filter',
+                (path, ppt_file[1], digest, MANIFEST_VERSION if digest is not None else None, self.signature))
+            deck_id = self.connection.execute('SELECT id FROM decks WHERE path = ?', (path,)).fetchone()[0]
+            for table in DECK_TABLES:
+                self.connection.execute(f'DELETE FROM {table} WHERE deck_id = ?', (deck_id,))
+
+            slides = {}
+            for part_table, table_rows in (('presentation', presentation_rows), ('layout', layout_rows), ('asset', asset_rows)):
+                for row in table_rows:
+                    slides.setdefault(row[1], part_table)
+            for row in anim_rows:
+                slides.setdefault(row[1], 'animation')
+
+            self.connection.executemany(
+                'INSERT INTO slides (deck_id, slide, part_table) VALUES (?, ?, ?)',
+                [(deck_id, slide, part_table) for slide, part_table in slides.items()])
+            self.connection.executemany(
+                'INSERT INTO assets (deck_id, slide, part_table, asset, parent, name, type, value) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(deck_id, row[1], part_table, *row[2:])
+                 for part_table, table_rows in (('asset', asset_rows), ('presentation', presentation_rows), ('layout', layout_rows))
+                 for row in table_rows])
+            self.connection.executemany(
+                'INSERT INTO animations (deck_id, slide, target, parent_type, property, value) VALUES (?, ?, ?, ?, ?, ?)',
+                [(deck_id, *row[1:]) for row in anim_rows])
+            self.connection.executemany(
+                'INSERT INTO relationships (deck_id, part, rel_id, target) VALUES (?, ?, ?, ?)',
+                [(deck_id, *relationship) for relationship in relationships])
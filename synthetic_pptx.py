@@ -0,0 +1,279 @@
+import os
+import zlib
+import struct
+import random
+import zipfile
+import argparse
+from xml.sax.saxutils import escape
+
+P_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+A_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+P14_NS = 'http://schemas.microsoft.com/office/powerpoint/2010/main'
+PKG_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+DOC_RELS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+MS_RELS = 'http://schemas.microsoft.com/office/2007/relationships/'
+NAMESPACES = f'xmlns:a="{A_NS}" xmlns:r="{R_NS}" xmlns:p="{P_NS}"'
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.'
+THEME_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.theme+xml'
+
+# Effects cycled through when filling a slide's timing tree
+EFFECTS = ['set', 'animEffect', 'anim', 'animMotion', 'animRot', 'animScale', 'animClr']
+
+WORDS = ['velocity', 'frame', 'relative', 'motion', 'observer', 'vector', 'speed',
+         'train', 'river', 'boat', 'angle', 'time', 'distance', 'ground', 'wind']
+
+
+def png_bytes(size, rng):
+    """Returns a valid size x size RGB PNG filled with noise, so every image has distinct content."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    rows = b''.join(b'\x00' + bytes(rng.getrandbits(8) for _ in range(size * 3)) for _ in range(size))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows))
+            + chunk(b'IEND', b''))
+
+def rels_xml(relationships):
+    """Returns a .rels part for (rel id, type, target) tuples."""
+    body = ''.join(f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="{target}"/>'
+                   for rel_id, rel_type, target in relationships)
+    return f'{XML_DECLARATION}<Relationships xmlns="{PKG_RELS_NS}">{body}</Relationships>'
+
+def xfrm(shape_id):
+    offset = (shape_id * 152400) % 8000000
+    return f'<a:xfrm><a:off x="{offset}" y="{offset // 2}"/><a:ext cx="1828800" cy="914400"/></a:xfrm>'
+
+def text_body(text):
+    return f'<p:txBody><a:bodyPr/><a:lstStyle/><a:p><a:r><a:rPr lang="en-US"/><a:t>{escape(text)}</a:t></a:r></a:p></p:txBody>'
+
+def shape_xml(shape_id, text, placeholder=None, custom=False):
+    nv_pr = f'<p:nvPr><p:ph type="{placeholder}"/></p:nvPr>' if placeholder else '<p:nvPr/>'
+    geometry = ('<a:custGeom><a:avLst/><a:gdLst/><a:rect l="0" t="0" r="r" b="b"/><a:pathLst/></a:custGeom>'
+                if custom else '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom>')
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Shape {shape_id}"/><p:cNvSpPr/>{nv_pr}</p:nvSpPr>'
+            f'<p:spPr>{xfrm(shape_id)}{geometry}</p:spPr>{text_body(text)}</p:sp>')
+
+def picture_xml(shape_id, image_rel, video_rels=None):
+    nv_pr = '<p:nvPr/>'
+    if video_rels:
+        link_rel, media_rel = video_rels
+        nv_pr = (f'<p:nvPr><a:videoFile r:link="{link_rel}"/><p:extLst><p:ext uri="{{DAA4B4D4-6D71-4841-9C94-3DE7FCFB9230}}">'
+                 f'<p14:media xmlns:p14="{P14_NS}" r:embed="{media_rel}"/></p:ext></p:extLst></p:nvPr>')
+    return (f'<p:pic><p:nvPicPr><p:cNvPr id="{shape_id}" name="Picture {shape_id}"/>'
+            f'<p:cNvPicPr><a:picLocks noChangeAspect="1"/></p:cNvPicPr>{nv_pr}</p:nvPicPr>'
+            f'<p:blipFill><a:blip r:embed="{image_rel}"/><a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+            f'<p:spPr>{xfrm(shape_id)}<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:pic>')
+
+def group_xml(shape_id, inner):
+    return (f'<p:grpSp><p:nvGrpSpPr><p:cNvPr id="{shape_id}" name="Group {shape_id}"/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+            f'<p:grpSpPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/><a:chOff x="0" y="0"/><a:chExt cx="0" cy="0"/></a:xfrm></p:grpSpPr>'
+            f'{inner}</p:grpSp>')
+
+def effect_xml(effect, ctn_id, shape_id):
+    behavior = (f'<p:cBhvr><p:cTn id="{ctn_id}" dur="500" fill="hold"/><p:tgtEl><p:spTgt spid="{shape_id}"/></p:tgtEl>'
+                '{attributes}</p:cBhvr>')
+    if effect == 'set':
+        return ('<p:set>' + behavior.format(attributes='<p:attrNameLst><p:attrName>style.visibility</p:attrName></p:attrNameLst>')
+                + '<p:to><p:strVal val="visible"/></p:to></p:set>')
+    if effect == 'animEffect':
+        return '<p:animEffect transition="in" filter="fade">' + behavior.format(attributes='') + '</p:animEffect>'
+    if effect == 'anim':
+        return ('<p:anim calcmode="lin" valueType="num">'
+                + behavior.format(attributes='<p:attrNameLst><p:attrName>ppt_x</p:attrName></p:attrNameLst>')
+                + '<p:tavLst><p:tav tm="0"><p:val><p:strVal val="#ppt_x"/></p:val></p:tav></p:tavLst></p:anim>')
+    if effect == 'animMotion':
+        return ('<p:animMotion origin="layout" path="M 0 0 L 0.25 0.1 E" pathEditMode="relative">'
+                + behavior.format(attributes='<p:attrNameLst><p:attrName>ppt_x</p:attrName><p:attrName>ppt_y</p:attrName></p:attrNameLst>')
+                + '</p:animMotion>')
+    if effect == 'animRot':
+        return '<p:animRot by="21600000">' + behavior.format(attributes='<p:attrNameLst><p:attrName>r</p:attrName></p:attrNameLst>') + '</p:animRot>'
+    if effect == 'animScale':
+        return '<p:animScale>' + behavior.format(attributes='') + '<p:by x="150000" y="150000"/></p:animScale>'
+    return ('<p:animClr clrSpc="rgb" dir="cw">'
+            + behavior.format(attributes='<p:attrNameLst><p:attrName>style.color</p:attrName></p:attrNameLst>')
+            + '<p:to><a:srgbClr val="FF0000"/></p:to></p:animClr>')
+
+def timing_xml(shape_ids, animations):
+    """Returns a p:timing tree with one click-triggered effect per animation, spread over shape_ids."""
+    if not animations or not shape_ids:
+        return ''
+    effects = []
+    ctn_id = 3
+    for i in range(animations):
+        effect = effect_xml(EFFECTS[i % len(EFFECTS)], ctn_id + 2, shape_ids[i % len(shape_ids)])
+        effects.append(f'<p:par><p:cTn id="{ctn_id}" fill="hold"><p:stCondLst><p:cond delay="indefinite"/></p:stCondLst>'
+                       f'<p:childTnLst><p:par><p:cTn id="{ctn_id + 1}" presetClass="entr" nodeType="clickEffect">'
+                       f'<p:childTnLst>{effect}</p:childTnLst></p:cTn></p:par></p:childTnLst></p:cTn></p:par>')
+        ctn_id += 3
+    return ('<p:timing><p:tnLst><p:par><p:cTn id="1" dur="indefinite" restart="never" nodeType="tmRoot"><p:childTnLst>'
+            '<p:seq concurrent="1" nextAc="seek"><p:cTn id="2" dur="indefinite" nodeType="mainSeq"><p:childTnLst>'
+            + ''.join(effects) +
+            '</p:childTnLst></p:cTn><p:prevCondLst><p:cond evt="onPrev" delay="0"><p:tgtEl><p:sldTgt/></p:tgtEl></p:cond></p:prevCondLst>'
+            '<p:nextCondLst><p:cond evt="onNext" delay="0"><p:tgtEl><p:sldTgt/></p:tgtEl></p:cond></p:nextCondLst></p:seq>'
+            '</p:childTnLst></p:cTn></p:par></p:tnLst></p:timing>')
+
+def slide_xml(slide_number, depth, media_rels, video_rels, animations, rng):
+    """Returns a slide part and its shape ids.
+
+    media_rels are the image relationship ids the slide's pictures use; the
+    pictures are nested inside depth levels of groups, one picture per level.
+    """
+    next_id = [2]
+    def new_id():
+        next_id[0] += 1
+        return next_id[0]
+
+    def sentence():
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+
+    def nested(level):
+        inner = shape_xml(new_id(), sentence(), custom=level % 2 == 1)
+        if media_rels:
+            inner += picture_xml(new_id(), media_rels[level % len(media_rels)])
+        if level < depth:
+            inner += nested(level + 1)
+        return group_xml(new_id(), inner)
+
+    shapes = shape_xml(2, f'Slide {slide_number}', placeholder='title')
+    shapes += shape_xml(new_id(), sentence(), placeholder='body')
+    if video_rels:
+        shapes += picture_xml(new_id(), media_rels[0] if media_rels else video_rels[1], video_rels)
+    if depth:
+        shapes += nested(1)
+    shape_ids = list(range(2, next_id[0] + 1))
+
+    return (f'{XML_DECLARATION}<p:sld {NAMESPACES}><p:cSld><p:spTree>'
+            '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+            '<p:grpSpPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/><a:chOff x="0" y="0"/><a:chExt cx="0" cy="0"/></a:xfrm></p:grpSpPr>'
+            f'{shapes}</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr>'
+            f'<p:transition spd="med"><p:fade/></p:transition>{timing_xml(shape_ids, animations)}</p:sld>')
+
+def master_xml():
+    return (f'{XML_DECLARATION}<p:sldMaster {NAMESPACES}><p:cSld><p:bg><p:bgRef idx="1001"><a:schemeClr val="bg1"/></p:bgRef></p:bg><p:spTree>'
+            '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>'
+            f'{shape_xml(2, "Click to edit Master title style", placeholder="title")}'
+            f'{shape_xml(3, "Click to edit Master text styles", placeholder="body")}</p:spTree></p:cSld>'
+            '<p:clrMap bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" accent3="accent3" '
+            'accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" folHlink="folHlink"/>'
+            '<p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/></p:sldLayoutIdLst>'
+            '<p:txStyles><p:titleStyle/><p:bodyStyle/><p:otherStyle/></p:txStyles></p:sldMaster>')
+
+def layout_xml():
+    return (f'{XML_DECLARATION}<p:sldLayout {NAMESPACES} type="titleAndContent" preserve="1"><p:cSld name="Title and Content"><p:spTree>'
+            '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>'
+            f'{shape_xml(2, "Title", placeholder="title")}{shape_xml(3, "Content", placeholder="body")}'
+            '</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>')
+
+def theme_xml():
+    colors = [('dk1', '000000'), ('lt1', 'FFFFFF'), ('dk2', '44546A'), ('lt2', 'E7E6E6'),
+              ('accent1', '4472C4'), ('accent2', 'ED7D31'), ('accent3', 'A5A5A5'), ('accent4', 'FFC000'),
+              ('accent5', '5B9BD5'), ('accent6', '70AD47'), ('hlink', '0563C1'), ('folHlink', '954F72')]
+    scheme = ''.join(f'<a:{name}><a:srgbClr val="{value}"/></a:{name}>' for name, value in colors)
+    fill = '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+    line = f'<a:ln w="6350">{fill}</a:ln>'
+    return (f'{XML_DECLARATION}<a:theme xmlns:a="{A_NS}" name="Synthetic"><a:themeElements>'
+            f'<a:clrScheme name="Synthetic">{scheme}</a:clrScheme>'
+            '<a:fontScheme name="Synthetic"><a:majorFont><a:latin typeface="Calibri Light"/><a:ea typeface=""/><a:cs typeface=""/></a:majorFont>'
+            '<a:minorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:minorFont></a:fontScheme>'
+            f'<a:fmtScheme name="Synthetic"><a:fillStyleLst>{fill * 3}</a:fillStyleLst><a:lnStyleLst>{line * 3}</a:lnStyleLst>'
+            '<a:effectStyleLst>' + '<a:effectStyle><a:effectLst/></a:effectStyle>' * 3 + '</a:effectStyleLst>'
+            f'<a:bgFillStyleLst>{fill * 3}</a:bgFillStyleLst></a:fmtScheme></a:themeElements></a:theme>')
+
+def write_synthetic_pptx(path, slides=10, depth=2, media=2, animations=4, videos=0, image_size=64, seed=0):
+    """Writes a valid .pptx with the given number of slides, group nesting depth,
+    distinct images, effects per slide and embedded videos."""
+    rng = random.Random(f'{seed}:{os.path.basename(path)}')
+    images = [f'image{i}.png' for i in range(1, media + 1)]
+    movies = [f'media{i}.mp4' for i in range(1, videos + 1)]
+
+    overrides = {
+        '/ppt/presentation.xml': CONTENT_TYPE + 'presentation.main+xml',
+        '/ppt/slideMasters/slideMaster1.xml': CONTENT_TYPE + 'slideMaster+xml',
+        '/ppt/slideLayouts/slideLayout1.xml': CONTENT_TYPE + 'slideLayout+xml',
+        '/ppt/theme/theme1.xml': THEME_CONTENT_TYPE,
+    }
+    for i in range(1, slides + 1):
+        overrides[f'/ppt/slides/slide{i}.xml'] = CONTENT_TYPE + 'slide+xml'
+    content_types = (f'{XML_DECLARATION}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                     '<Default Extension="xml" ContentType="application/xml"/>'
+                     '<Default Extension="png" ContentType="image/png"/><Default Extension="mp4" ContentType="video/mp4"/>'
+                     + ''.join(f'<Override PartName="{name}" ContentType="{content_type}"/>' for name, content_type in overrides.items())
+                     + '</Types>')
+
+    slide_ids = ''.join(f'<p:sldId id="{255 + i}" r:id="rId{i + 2}"/>' for i in range(1, slides + 1))
+    presentation = (f'{XML_DECLARATION}<p:presentation {NAMESPACES} saveSubsetFonts="1">'
+                    '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+                    f'<p:sldIdLst>{slide_ids}</p:sldIdLst><p:sldSz cx="12192000" cy="6858000"/>'
+                    '<p:notesSz cx="6858000" cy="9144000"/><p:defaultTextStyle/></p:presentation>')
+    presentation_rels = [('rId1', DOC_RELS + 'slideMaster', 'slideMasters/slideMaster1.xml'),
+                         ('rId2', DOC_RELS + 'theme', 'theme/theme1.xml')]
+    presentation_rels += [(f'rId{i + 2}', DOC_RELS + 'slide', f'slides/slide{i}.xml') for i in range(1, slides + 1)]
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as pptx:
+        pptx.writestr('[Content_Types].xml', content_types)
+        pptx.writestr('_rels/.rels', rels_xml([('rId1', DOC_RELS + 'officeDocument', 'ppt/presentation.xml')]))
+        pptx.writestr('ppt/presentation.xml', presentation)
+        pptx.writestr('ppt/_rels/presentation.xml.rels', rels_xml(presentation_rels))
+        pptx.writestr('ppt/slideMasters/slideMaster1.xml', master_xml())
+        pptx.writestr('ppt/slideMasters/_rels/slideMaster1.xml.rels', rels_xml([
+            ('rId1', DOC_RELS + 'slideLayout', '../slideLayouts/slideLayout1.xml'),
+            ('rId2', DOC_RELS + 'theme', '../theme/theme1.xml')]))
+        pptx.writestr('ppt/slideLayouts/slideLayout1.xml', layout_xml())
+        pptx.writestr('ppt/slideLayouts/_rels/slideLayout1.xml.rels', rels_xml([
+            ('rId1', DOC_RELS + 'slideMaster', '../slideMasters/slideMaster1.xml')]))
+        pptx.writestr('ppt/theme/theme1.xml', theme_xml())
+
+        for i in range(1, slides + 1):
+            slide_rels = [('rId1', DOC_RELS + 'slideLayout', '../slideLayouts/slideLayout1.xml')]
+            # Each slide uses up to two of the deck's images, so media is shared between slides
+            media_rels = []
+            for n, image in enumerate(images[(i - 1) % media:][:2] if images else []):
+                media_rels.append(f'rId{n + 2}')
+                slide_rels.append((media_rels[-1], DOC_RELS + 'image', f'../media/{image}'))
+            video_rels = None
+            if movies:
+                movie = movies[(i - 1) % videos]
+                video_rels = ('rId10', 'rId11')
+                slide_rels.append(('rId10', DOC_RELS + 'video', f'../media/{movie}'))
+                slide_rels.append(('rId11', MS_RELS + 'media', f'../media/{movie}'))
+            pptx.writestr(f'ppt/slides/slide{i}.xml', slide_xml(i, depth, media_rels, video_rels, animations, rng))
+            pptx.writestr(f'ppt/slides/_rels/slide{i}.xml.rels', rels_xml(slide_rels))
+
+        # Media is already compressed, so it is stored the way PowerPoint stores it
+        for image in images:
+            pptx.writestr(f'ppt/media/{image}', png_bytes(image_size, rng), zipfile.ZIP_STORED)
+        for movie in movies:
+            pptx.writestr(f'ppt/media/{movie}', bytes(rng.getrandbits(8) for _ in range(image_size * image_size * 3)),
+                          zipfile.ZIP_STORED)
+
+def write_corpus(directory, decks=10, **options):
+    """Writes decks synthetic presentations to directory and returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(1, decks + 1):
+        path = os.path.join(directory, f'synthetic_{i:04d}.pptx')
+        write_synthetic_pptx(path, **options)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic .pptx files for benchmarking.")
+    parser.add_argument("directory", help="directory the decks are written to")
+    parser.add_argument("--decks", type=int, default=10, help="number of decks (default: 10)")
+    parser.add_argument("--slides", type=int, default=10, help="slides per deck (default: 10)")
+    parser.add_argument("--depth", type=int, default=2, help="group nesting depth on each slide (default: 2)")
+    parser.add_argument("--media", type=int, default=2, help="distinct images per deck (default: 2)")
+    parser.add_argument("--videos", type=int, default=0, help="distinct embedded videos per deck (default: 0)")
+    parser.add_argument("--animations", type=int, default=4, help="animation effects per slide (default: 4)")
+    parser.add_argument("--image-size", type=int, default=64, help="width and height of each image in pixels (default: 64)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated text and media (default: 0)")
+    args = parser.parse_args()
+
+    paths = write_corpus(args.directory, args.decks, slides=args.slides, depth=args.depth, media=args.media,
+                         animations=args.animations, videos=args.videos, image_size=args.image_size, seed=args.seed)
+    print(f"✅ Wrote {len(paths)} synthetic decks to '{args.directory}'")
@@ -1,8 +1,15 @@
 import csv
 import json
+import argparse
+from functools import partial
 from collections import defaultdict
+from columnar import is_columnar, read_rows
+from media_store import asset_value, media_store_argument, open_media_store
 
 def read_csv_to_dict(file_path):
+    # Columnar copies written by pptxsir.py --columnar are read the same way
+    if is_columnar(file_path):
+        return read_rows(file_path)
     with open(file_path, mode='r', newline='') as csv_file:
         return list(csv.DictReader(csv_file))
 
@@ -10,7 +17,7 @@ def replace_rid_with_path(value, base_path):
     # Assuming the base path is where media files are stored
     return f"{base_path}/{value}"
 
-def combine_data_by_slide(animation_data, asset_data, presentation_data, layout_data, base_path):
+def combine_data_by_slide(animation_data, asset_data, presentation_data, layout_data, base_path, media_store=None):
     combined_data = defaultdict(lambda: {'animations': [], 'assets': [], 'presentation': [], 'layout': []})
 
     for row in animation_data:
@@ -23,16 +30,16 @@ def combine_data_by_slide(animation_data, asset_data, presentation_data, layout_
             'value': row['Value']
         })
 
+    local_path = partial(replace_rid_with_path, base_path=base_path)
     for row in asset_data:
         slide = row['Slide']
-        # Replace 'rid' with folder path for media files
-        if row['Type'] == 'Media':
-            row['Value'] = replace_rid_with_path(row['Value'], base_path)
+        # Replace 'rid' with folder path for media files, or with the media's stored location
+        value = asset_value(media_store, row, local_path)
         # Filter out unnecessary fields and add to assets
         combined_data[slide]['assets'].append({
             'name': row['Name'],
             'type': row['Type'],
-            'value': row['Value']
+            'value': value
         })
 
     for row in presentation_data:
@@ -59,17 +66,23 @@ def write_json(data, output_file):
     with open(output_file, 'w') as json_file:
         json.dump(data, json_file, indent=4)
 
-# Read data from CSV files
-animation_data = read_csv_to_dict('animation.csv')
-asset_data = read_csv_to_dict('asset.csv')
-presentation_data = read_csv_to_dict('presentation.csv')
-layout_data = read_csv_to_dict('layout.csv')
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combine the extracted tables into per-slide JSON.")
+    media_store_argument(parser)
+    args = parser.parse_args()
+    media_store = open_media_store(parser, args)
+
+    # Read data from CSV files
+    animation_data = read_csv_to_dict('animation.csv')
+    asset_data = read_csv_to_dict('asset.csv')
+    presentation_data = read_csv_to_dict('presentation.csv')
+    layout_data = read_csv_to_dict('layout.csv')
 
-# Define the base path for media files
-base_path = 'media_files'
+    # Define the base path for media files
+    base_path = 'media_files'
 
-# Combine data by slide
-combined_data = combine_data_by_slide(animation_data, asset_data, presentation_data, layout_data, base_path)
+    # Combine data by slide
+    combined_data = combine_data_by_slide(animation_data, asset_data, presentation_data, layout_data, base_path, media_store)
 
-# Write combined data to JSON
-write_json(combined_data, 'updated.json')
\ No newline at end of file
+    # Write combined data to JSON
+    write_json(combined_data, 'updated.json')